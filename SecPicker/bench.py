@@ -0,0 +1,189 @@
+"""SecPicker 性能测试（不需要图形界面）
+
+用法：
+  python bench.py                      在 50 ~ 1000000 行的名单上测试所有热点路径
+  python bench.py --sizes 50,10000     指定名单行数
+  python bench.py --load 100000        只测试名单加载的耗时与内存
+  python bench.py --json out.json      同时把结果写入JSON，便于对比不同版本
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import tempfile
+import subprocess
+import tracemalloc
+
+SIZES = [50, 1000, 10000, 100000, 1000000]
+
+def make_csv(path, rows):
+    """生成测试用名单"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("name,sex,no\n")
+        for i in range(rows):
+            f.write("学生%d,%d,%d\n" % (i, i % 3, i + 1))
+
+def measure_load(path, loader):
+    """在子进程中测量一次名单加载的耗时和内存峰值"""
+    code = """
+import sys, json, time, tracemalloc
+sys.path.insert(0, %r)
+from secpicker import picker
+if %r == "pandas":
+    # load_csv 在没有pandas时会静默退回csv解析，这里先确认pandas可用，否则以非0状态退出
+    try:
+        import pandas
+    except ImportError:
+        sys.exit(1)
+    picker.PANDAS_THRESHOLD = -1
+else:
+    picker.PANDAS_THRESHOLD = float("inf")
+t = time.perf_counter()
+roster = picker.load_csv(%r)
+t = time.perf_counter() - t
+del roster
+tracemalloc.start()
+roster = picker.load_csv(%r)
+peak = tracemalloc.get_traced_memory()[1]
+try:
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+except ImportError:
+    rss = 0
+print(json.dumps({"rows": roster.length, "seconds": t, "peak_alloc": peak, "peak_rss": rss}))
+""" % (os.path.dirname(os.path.abspath(__file__)), loader, path, path)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if out.returncode != 0:
+        return None
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def bench_load(rows):
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "names.csv")
+        make_csv(path, rows)
+        print("名单加载（%d 行，%.1f MB）" % (rows, os.path.getsize(path) / 1048576))
+        for loader in ("csv", "pandas"):
+            r = measure_load(path, loader)
+            if r is None:
+                print("  %-7s 不可用" % loader)
+                continue
+            print("  %-7s %8.1f ms  分配峰值 %7.1f MB  RSS峰值 %7.1f MB" % (
+                loader, r["seconds"] * 1000, r["peak_alloc"] / 1048576, r["peak_rss"] / 1048576))
+
+def timeit(fn, budget=0.2, number=None):
+    """反复执行fn，返回每次执行耗时的中位数（秒）"""
+    times = []
+    end = time.perf_counter() + budget
+    while (number is None and (time.perf_counter() < end or len(times) < 3)) or (number is not None and len(times) < number):
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    times.sort()
+    return times[len(times) // 2]
+
+def make_roster(rows):
+    from secpicker.picker import Roster
+    return Roster({
+        "name": ["学生%d" % i for i in range(rows)],
+        "sex": [str(i % 3) for i in range(rows)],
+        "no": [str(i + 1) for i in range(rows)]
+    })
+
+def bench_draw(rows):
+    """各个抽选热点路径的耗时，单位为秒"""
+    from secpicker.picker import Picker, load_roster, make_filters
+    res = {}
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "names.csv")
+        cache = os.path.join(d, "names.cache")
+        make_csv(path, rows)
+        res["parse"] = timeit(lambda: load_roster(path), number=3)
+        load_roster(path, cache)
+        res["cache"] = timeit(lambda: load_roster(path, cache), number=3)
+    roster = make_roster(rows)
+    picker = Picker(roster)
+    everyone = make_filters()
+    boys_even = make_filters(sex="0", parity="0")
+    k = min(100, rows)
+    res["pick"] = timeit(lambda: picker.draw(1, everyone))
+    res["pick_repeat"] = timeit(lambda: picker.draw(1, everyone, repeat=True))
+    res["pick_weighted"] = timeit(lambda: picker.draw(1, everyone, weighted=True))
+    res["pick_filtered"] = timeit(lambda: picker.draw(1, boys_even))
+    res["pick_many_%d" % k] = timeit(lambda: picker.draw(k, everyone))
+    res["pick_many_%d_filtered" % k] = timeit(lambda: picker.draw(k, boys_even))
+    def exhaust():
+        fresh = Picker(roster)
+        for _ in range(rows):
+            fresh.draw(1, everyone)
+    res["exhaust"] = timeit(exhaust, number=1)
+    mid = rows // 2
+    def update():
+        picker.update(roster.nos[mid], {"sex": "1" if roster.columns["sex"][mid] == "0" else "0"})
+    res["edit_update"] = timeit(update)
+    added = itertools.count(rows + 1)
+    def add_remove():
+        no = str(next(added))
+        picker.add({"name": "新学生", "sex": "0", "no": no})
+        picker.remove(no)
+    res["edit_add_remove"] = timeit(add_remove)
+    return res
+
+def bench_import():
+    """只获取插件信息时的导入耗时（python -X importtime），导入失败时抛出RuntimeError"""
+    code = "import main; main.get_plugin_info()"
+    with tempfile.TemporaryDirectory() as d:
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import sys; sys.path.insert(0, %r); %s" % (
+            os.path.dirname(os.path.abspath(__file__)), code)], capture_output=True, text=True, cwd=d)
+    if out.returncode != 0:
+        lines = [line for line in out.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(lines[-1] if lines else "退出码 %d" % out.returncode)
+    total = 0
+    heavy = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [x.strip() for x in line[len("import time:"):].split("|")]
+        if name == "main":
+            total = int(cumulative) / 1e6
+        if name.split(".")[0] in ("PyQt5", "qfluentwidgets", "pandas", "numpy"):
+            heavy.append(name)
+    return total, heavy
+
+def fmt(seconds):
+    if seconds >= 1:
+        return "%.2f s" % seconds
+    if seconds >= 1e-3:
+        return "%.2f ms" % (seconds * 1e3)
+    return "%.2f us" % (seconds * 1e6)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SecPicker 性能测试")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="名单行数，逗号分隔")
+    parser.add_argument("--load", type=int, help="只测试名单加载（指定行数）")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    args = parser.parse_args()
+    if args.load:
+        bench_load(args.load)
+        sys.exit(0)
+
+    results = {}
+    try:
+        total, heavy = bench_import()
+    except RuntimeError as e:
+        results["import_main"] = None
+        print("导入main（只取插件信息）失败：%s" % e)
+    else:
+        results["import_main"] = total
+        print("导入main（只取插件信息）：%s%s" % (fmt(total), "，额外导入了 " + ", ".join(sorted(set(heavy))) if heavy else ""))
+    for rows in [int(x) for x in args.sizes.split(",")]:
+        res = bench_draw(rows)
+        results[str(rows)] = res
+        print("名单 %d 行" % rows)
+        for name, t in res.items():
+            extra = "（每次 %s）" % fmt(t / rows) if name == "exhaust" else ""
+            print("  %-24s %12s%s" % (name, fmt(t), extra))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
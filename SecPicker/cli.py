@@ -0,0 +1,213 @@
+"""SecPicker 命令行模式：不启动界面，批量抽选并以 JSON Lines / CSV 输出
+
+示例：
+  python cli.py names.csv -n 100                       抽100次，输出到标准输出
+  python cli.py names.csv -n 30 --sex 1 --parity 0     只抽学号为双数的女生
+  python cli.py names.csv -n 5 --by class -o out.csv   按 class 列分班，每班抽5人
+  python cli.py 1班.csv 2班.csv 3班.csv -n 40            多份名单各抽40人
+  python cli.py 班级/*.csv -n 40 -j 8 --cache 缓存       8个进程并行抽选数百份名单
+  python cli.py names.csv -n 40 --seed 42              指定种子，每次运行结果相同
+  python cli.py names.csv --verify history.log         按抽选记录中的种子重新生成并核对结果
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+import shutil
+import hashlib
+import tempfile
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from secpicker.picker import Picker, load_roster, make_filters, regenerate
+
+CHUNK = 10000  # 每次向抽选引擎要多少个结果，兼顾吞吐量和内存
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="secpicker", description="SecPicker 命令行批量抽选")
+    parser.add_argument("rosters", nargs="+", help="名单CSV文件，可以指定多个")
+    parser.add_argument("-n", "--count", type=int, default=1, help="每份名单（或每个班）抽选的次数")
+    parser.add_argument("--sex", choices=["0", "1", "2"], help="只抽某一性别：0男 1女 2特殊性别")
+    parser.add_argument("--parity", choices=["0", "1"], help="只抽学号为双数(0)或单数(1)的学生")
+    parser.add_argument("--filter", action="append", default=[], metavar="列=值", help="按名单中的其他列筛选，可重复")
+    parser.add_argument("--by", metavar="列", help="按该列分组（例如班级），每组分别抽选")
+    parser.add_argument("--repeat", action="store_true", help="允许重复抽到同一个人")
+    parser.add_argument("--fair", action="store_true", help="按被抽到的次数加权，次数越少越容易抽到（允许重复）")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="输出格式，默认按输出文件扩展名判断，否则为jsonl")
+    parser.add_argument("-o", "--output", help="输出文件，默认输出到标准输出")
+    parser.add_argument("--cache", help="名单缓存目录，指定后会复用已编译的名单")
+    parser.add_argument("-j", "--jobs", type=int, help="并行抽选的进程数，多份名单时分给多个进程，默认为CPU核数")
+    parser.add_argument("--seed", type=int, help="随机数种子，每份名单由它派生独立的随机数流；不指定时随机生成")
+    parser.add_argument("--verify", metavar="抽选记录", help="不抽选，按抽选记录中的种子重新生成每次抽选并与记录核对")
+    return parser.parse_args(argv)
+
+def groups(picker, args):
+    """生成 (分组名, 筛选条件) 列表"""
+    roster = picker.roster
+    extra = {}
+    for item in args.filter:
+        column, _, value = item.partition("=")
+        if column not in roster.bitmaps:
+            roster.add_filter(column)
+        extra[column] = value
+    base = dict(extra, sex=args.sex, parity=args.parity)
+    if not args.by:
+        return [(None, make_filters(**base))]
+    if args.by not in roster.bitmaps:
+        roster.add_filter(args.by)
+    values = sorted(roster.bitmaps[args.by])
+    if base.get(args.by) is not None:
+        # 同一列既分组又筛选时只保留符合筛选条件的组
+        values = [v for v in values if v == base[args.by]]
+    return [(v, make_filters(**dict(base, **{args.by: v}))) for v in values]
+
+def cache_path(directory, path):
+    """名单在缓存目录中的缓存文件，文件名带上完整路径的哈希，不同目录下的同名名单不会共用缓存"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, "%s-%s.cache" % (stem, digest))
+
+class Output:
+    """按格式写出抽选结果，CSV只有一个表头，以第一份有结果的名单的列为准"""
+
+    def __init__(self, out, fmt, header=None):
+        self.out = out
+        self.fmt = fmt
+        self.header = header  # 给定时不再写表头（子进程写临时文件时使用）
+        self.writer = csv.writer(out) if fmt == "csv" else None
+
+    def start(self, columns):
+        """第一次写出结果前写CSV表头"""
+        if self.fmt == "csv" and self.header is None:
+            self.header = columns
+            self.writer.writerow(["roster", "group", "seq"] + columns)
+
+    def write(self, roster, name, group, seq, rows):
+        """写出一批抽选结果，seq为这一批之前已写出的条数"""
+        columns = list(roster.columns)
+        self.start(columns)
+        if self.fmt == "jsonl":
+            lines = []
+            for r in rows:
+                seq += 1
+                rec = {"roster": name, "seq": seq}
+                if group is not None:
+                    rec["group"] = group
+                for k in columns:
+                    rec[k] = roster.columns[k][r]
+                lines.append(json.dumps(rec, ensure_ascii=False))
+            self.out.write("\n".join(lines) + "\n")
+        else:
+            cols = [roster.columns.get(k) for k in self.header]
+            for r in rows:
+                seq += 1
+                self.writer.writerow([name, "" if group is None else group, seq] + [c[r] if c else "" for c in cols])
+
+    def copy(self, f, columns):
+        """把子进程写好的一份名单的结果接到输出后面"""
+        self.start(columns)
+        if self.fmt == "jsonl" or columns == self.header:
+            shutil.copyfileobj(f, self.out)
+            return
+        # 这份名单的列与表头不同，按表头重新排列
+        for row in csv.reader(f):
+            values = dict(zip(columns, row[3:]))
+            self.writer.writerow(row[:3] + [values.get(k, "") for k in self.header])
+
+def draw_chunks(path, stream, args):
+    """抽选一份名单，每次最多CHUNK条，逐批生成 (名单, 名单名, 分组名, 已抽条数, 行号列表)"""
+    cache = cache_path(args.cache, path) if args.cache else None
+    picker = Picker.load(path, cache, seed=stream)
+    roster = picker.roster
+    name = os.path.splitext(os.path.basename(path))[0]
+    try:
+        todo = groups(picker, args)
+    except KeyError as e:
+        print("名单 %s 中没有 %s 列，已跳过" % (path, e), file=sys.stderr)
+        return
+    for group, filters in todo:
+        seq = 0
+        left = args.count
+        while left > 0:
+            rows = picker.draw(min(left, CHUNK), filters, args.repeat, args.fair)
+            if not rows:
+                break
+            left -= len(rows)
+            yield roster, name, group, seq, rows
+            seq += len(rows)
+
+def draw_to_file(path, stream, args, fmt, directory):
+    """在子进程中抽选一份名单，结果写入directory下的临时文件，返回 (临时文件, 名单列名, 抽选条数)
+
+    CSV不写表头，按本名单的列写出，由主进程按名单顺序拼接。
+    """
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix="roster-")
+    columns = None
+    total = 0
+    with open(fd, "w", encoding="utf-8", newline="") as f:
+        output = None
+        for roster, name, group, seq, rows in draw_chunks(path, stream, args):
+            if output is None:
+                columns = list(roster.columns)
+                output = Output(f, fmt, columns)
+            output.write(roster, name, group, seq, rows)
+            total += len(rows)
+    return tmp, columns, total
+
+def run(args, out):
+    fmt = args.format
+    if fmt is None:
+        fmt = "csv" if args.output and args.output.lower().endswith(".csv") else "jsonl"
+    output = Output(out, fmt)
+    total = 0
+    seed = np.random.SeedSequence(args.seed)
+    print("随机数种子：%d" % seed.entropy, file=sys.stderr)
+    # 每份名单的随机数流都在主进程里按名单顺序派生，结果也按名单顺序写出，
+    # 因此输出只取决于种子，与进程数无关
+    streams = seed.spawn(len(args.rosters))
+    jobs = min(args.jobs or os.cpu_count() or 1, len(args.rosters))
+    if jobs <= 1:
+        # 边抽边写，内存占用与抽选次数无关
+        for path, stream in zip(args.rosters, streams):
+            for roster, name, group, seq, rows in draw_chunks(path, stream, args):
+                output.write(roster, name, group, seq, rows)
+                total += len(rows)
+        return total
+    # 每个子进程把一份名单的结果写到自己的临时文件，主进程按名单顺序依次拼接
+    with tempfile.TemporaryDirectory(prefix="secpicker-") as d, ProcessPoolExecutor(jobs) as pool:
+        results = pool.map(draw_to_file, args.rosters, streams, repeat(args), repeat(fmt), repeat(d))
+        for tmp, columns, count in results:
+            if count:
+                with open(tmp, "r", encoding="utf-8", newline="") as f:
+                    output.copy(f, columns)
+            os.remove(tmp)
+            total += count
+    return total
+
+def verify(args):
+    """按抽选记录重新生成抽选结果，全部一致时返回0"""
+    failed = 0
+    for path in args.rosters:
+        matched, mismatched = regenerate(load_roster(path, None), args.verify)
+        for seed, expected, got in mismatched:
+            print("种子 %d：记录为 %s，重新生成为 %s" % (seed, expected, got), file=sys.stderr)
+        print("%s：%d 次抽选一致，%d 次不一致" % (path, matched, len(mismatched)), file=sys.stderr)
+        failed += len(mismatched)
+    return 1 if failed else 0
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.verify:
+        return verify(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            total = run(args, f)
+    else:
+        total = run(args, sys.stdout)
+    print("共输出 %d 条抽选结果" % total, file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
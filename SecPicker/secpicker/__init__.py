@@ -0,0 +1,13 @@
+"""SecPicker 插件的实现
+
+所有模块都放在这个包里并使用相对导入，插件目录只以 secpicker、main、service 等少数名字
+出现在 sys.path 上，不会遮住宿主程序自己的 gui、metrics 之类的同名模块。
+本文件只包含插件元数据，导入它不会加载 PyQt、numpy 等重量级依赖。
+"""
+import os
+
+VERSION = "v33550336.402604032"
+CODENAME = "Robin"
+APIVER = 1
+CONFIG_PATH = "app/plugin/SecPicker/config.json"
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # main.py 所在的插件目录
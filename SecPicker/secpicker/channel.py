@@ -0,0 +1,211 @@
+"""抽选结果通道：把结果交给 ClassIsland / Class Widgets 上的联动插件"""
+import os
+import sys
+import json
+import time
+import queue
+import tempfile
+import threading
+from multiprocessing.connection import Listener, Client
+from loguru import logger
+
+WRITE_RETRIES = 5  # 结果文件被占用时的重试次数
+WRITE_RETRY_DELAY = 0.02  # 每次重试前等待的秒数
+
+def atomic_write(path, data):
+    """先写同目录下的临时文件再替换，读取方不会看到写了一半的文件"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".secpicker-")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+class ResultChannel:
+    """结果通道
+
+    每次抽选把结果以一次原子写入的方式写到 secpicker_result.json：
+      {"seq": 序号, "time": 时间戳, "results": [{"name": 姓名, "no": 学号}, ...], "text": 显示文本}
+    序号单调递增，联动插件只需轮询该文件的修改时间，发生变化时再读取并比较序号。
+    旧版联动插件使用的 res.txt 与 unread 同样原子写入，并保证先写结果再写标记。
+    """
+
+    def __init__(self, directory=None, publisher=None):
+        self.directory = directory or tempfile.gettempdir()
+        self.publisher = publisher  # 可选的本地推送端，见 ResultPublisher
+        self.path = os.path.join(self.directory, "secpicker_result.json")
+        self.seq = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.seq = int(json.load(f)["seq"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def publish(self, results, files=True):
+        """发布一次抽选结果，返回其序号；files为False时只推送给订阅者，不写文件"""
+        self.seq += 1
+        text = "".join("%s（%s）" % (i["name"], i["no"]) for i in results)
+        payload = {
+            "seq": self.seq,
+            "time": time.time(),
+            "results": [{"name": i["name"], "no": i["no"]} for i in results],
+            "text": text
+        }
+        data = json.dumps(payload, ensure_ascii=False)
+        if self.publisher:
+            self.publisher.publish(data.encode("utf-8"))
+        if files:
+            self._write(self.path, data)
+            # unread 只在 res.txt 写成功后才写，旧版插件看到标记时总能读到本次结果
+            if self._write(os.path.join(self.directory, "res.txt"), text):
+                self._write(os.path.join(self.directory, "unread"), "111")
+        return self.seq
+
+    def _write(self, path, data):
+        """原子写入结果文件，返回是否成功
+
+        Windows 上读取方打开文件期间 os.replace 会失败（PermissionError），
+        此时稍等后重试，仍然失败就记录日志并放弃本次写入，不影响抽选本身。
+        """
+        for attempt in range(WRITE_RETRIES):
+            try:
+                atomic_write(path, data)
+                return True
+            except OSError as e:
+                if attempt == WRITE_RETRIES - 1:
+                    logger.warning("写入结果文件 %s 失败：%s" % (path, e))
+                    return False
+                time.sleep(WRITE_RETRY_DELAY)
+
+
+def default_address():
+    """本地推送地址：Windows 上是命名管道，其他系统是临时目录下的 Unix 域套接字"""
+    if os.name == "nt":
+        return r"\\.\pipe\secpicker"
+    return os.path.join(tempfile.gettempdir(), "secpicker.sock")
+
+
+class _Subscriber:
+    """一个订阅者：有界队列 + 独立的发送线程，慢的订阅者不会拖住抽选"""
+
+    def __init__(self, conn, backlog, on_close):
+        self.conn = conn
+        self.queue = queue.Queue(maxsize=backlog)
+        self.dropped = 0
+        self.on_close = on_close
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def put(self, data):
+        """放入一条消息，队列满时丢弃最旧的一条"""
+        while True:
+            try:
+                self.queue.put_nowait(data)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        self.put(None)
+
+    def _run(self):
+        try:
+            while True:
+                data = self.queue.get()
+                if data is None:
+                    break
+                self.conn.send_bytes(data)
+        except OSError:
+            pass
+        finally:
+            self.conn.close()
+            self.on_close(self)
+
+
+class ResultPublisher:
+    """本地推送端：每次抽选立即推送给所有已连接的订阅者
+
+    消息是 multiprocessing.connection 的定长帧（send_bytes / recv_bytes），内容为 UTF-8 JSON，
+    每个订阅者最多积压 backlog 条，超出时丢弃最旧的消息。
+    """
+
+    def __init__(self, address=None, backlog=64):
+        self.address = address or default_address()
+        self.backlog = backlog
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.listener = None
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        if os.name != "nt" and os.path.exists(self.address):
+            os.remove(self.address)  # 上次异常退出留下的套接字文件
+        self.listener = Listener(self.address)
+        self.running = True
+        self.thread = threading.Thread(target=self._accept, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        try:
+            Client(self.address).close()  # 唤醒阻塞在 accept 上的线程
+        except OSError:
+            pass
+        self.thread.join(timeout=1)
+        self.listener.close()
+        with self.lock:
+            subs = list(self.subscribers)
+        for sub in subs:
+            sub.close()
+
+    def publish(self, data):
+        with self.lock:
+            subs = list(self.subscribers)
+        for sub in subs:
+            sub.put(data)
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn = self.listener.accept()
+            except OSError:
+                break
+            if not self.running:
+                conn.close()
+                break
+            sub = _Subscriber(conn, self.backlog, self._remove)
+            with self.lock:
+                self.subscribers.add(sub)
+            sub.thread.start()
+
+    def _remove(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+
+def subscribe(address=None):
+    """订阅抽选结果，逐条返回解析后的消息"""
+    with Client(address or default_address()) as conn:
+        while True:
+            try:
+                data = conn.recv_bytes()
+            except EOFError:
+                return
+            yield json.loads(data.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    # 作为独立脚本运行时充当一个订阅者，用于测试推送
+    for msg in subscribe(sys.argv[1] if len(sys.argv) > 1 else None):
+        print(json.dumps(msg, ensure_ascii=False), flush=True)
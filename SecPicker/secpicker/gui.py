@@ -0,0 +1,926 @@
+import os
+import sys
+import time
+import atexit
+import hashlib
+import tempfile
+import traceback
+from loguru import logger
+from numpy.random import SeedSequence
+from PyQt5.QtCore import *
+from PyQt5.QtWidgets import *
+from PyQt5.QtGui import QIcon,QPainter,QPixmap,QDesktopServices
+from qfluentwidgets import *
+if os.name == 'nt':
+    from win32com.client import Dispatch
+from . import CODENAME, APIVER, CONFIG_PATH, PLUGIN_DIR
+from .picker import Picker, PickerPool, load_roster, make_filters
+from .journal import Journal
+from .channel import ResultChannel, ResultPublisher
+from .service import start_background_service
+from . import metrics
+from .metrics import span
+
+temp_dir = tempfile.gettempdir()
+CACHE_PATH = os.path.join(os.path.dirname(CONFIG_PATH), "names.cache")
+JOURNAL_PATH = os.path.join(os.path.dirname(CONFIG_PATH), "history.log")
+ROSTER_DIR = "rosters"  # 其他班级的名单：rosters/<名单名>.csv
+DEFAULT_ROSTER = "names"  # 对应工作目录下的 names.csv
+LOG_PATH = "secpicker.log"
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 日志超过该大小就轮换
+LOG_MAX_AGE = 7 * 24 * 3600  # 或者写满这么长时间就轮换
+LOG_RETENTION = 10  # 保留多少份压缩后的旧日志
+ready = False
+error_dialog = None
+tray = None
+unlocked = [False,False]
+SEX_FILTERS = {"都抽": None, "只抽男": "0", "只抽女": "1", "只抽特殊性别": "2"}
+NUM_FILTERS = {"都抽": None, "只抽双数": "0", "只抽单数": "1"}
+
+def roster_names():
+    """可用的名单：names.csv 加上 rosters 目录下的所有 CSV"""
+    names = [DEFAULT_ROSTER]
+    if os.path.isdir(ROSTER_DIR):
+        names += sorted(os.path.splitext(f)[0] for f in os.listdir(ROSTER_DIR)
+                        if f.lower().endswith(".csv") and os.path.splitext(f)[0] != DEFAULT_ROSTER)
+    return names
+
+def roster_paths(name):
+    """返回名单的 (CSV文件, 缓存文件, 抽选记录) 路径，names.csv 沿用原来的文件名"""
+    base = os.path.dirname(CONFIG_PATH)
+    if name == DEFAULT_ROSTER:
+        return "names.csv", CACHE_PATH, JOURNAL_PATH
+    return (os.path.join(ROSTER_DIR, name + ".csv"),
+            os.path.join(base, "rosters", name + ".cache"),
+            os.path.join(base, "rosters", name + ".log"))
+
+QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+QApplication.setAttribute(Qt.AA_EnableHighDpiScaling)
+QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps)
+
+class Config(QConfig):
+    allowRepeat = ConfigItem("General","allowRepeat",False,BoolValidator())
+    fairDraw = ConfigItem("General", "fairDraw", False, BoolValidator())
+    supportCS = ConfigItem("General", "supportCS", False, BoolValidator())
+    pushResult = ConfigItem("General", "pushResult", False, BoolValidator())
+    roster = ConfigItem("General", "roster", "names")
+    rosterCache = RangeConfigItem("General", "rosterCache", 8, RangeValidator(1, 64))
+    chooseKey = ConfigItem("General","chooseKey","ctrl+w")
+    autoStartup = ConfigItem("General","autoStartup",False,BoolValidator())
+    lockNameEdit = ConfigItem("Secure","lockNameEdit",False,BoolValidator())
+    lockConfigEdit = ConfigItem("Secure","lockConfigItem",False,BoolValidator())
+    keyChecksum = ConfigItem("Secure","keyChecksum","0")
+    logLevel = OptionsConfigItem("Debug", "logLevel", "INFO", OptionsValidator(["DEBUG", "INFO", "WARNING","ERROR"]), restart=True)
+    apiver = ConfigItem("Version", "apiver", 1)
+
+cfg = Config()
+
+class LogRotation:
+    """日志文件超过LOG_MAX_BYTES或者写满LOG_MAX_AGE秒后轮换
+
+    日志的起始时间取文件中第一条记录的时间：修改时间每写一条都会刷新，不能用来计算日志写了多久。
+    """
+
+    def __init__(self, size, seconds):
+        self.size = size
+        self.seconds = seconds
+        self.start = None
+
+    @staticmethod
+    def first_record(path):
+        """读取日志文件第一条记录的时间戳（loguru默认格式以本地时间开头），读不出时返回None"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                line = f.readline()
+            return time.mktime(time.strptime(line[:19], "%Y-%m-%d %H:%M:%S"))
+        except (OSError, ValueError):
+            return None
+
+    def __call__(self, message, file):
+        now = message.record["time"].timestamp()
+        if self.start is None:
+            self.start = (self.first_record(file.name) if file.tell() else None) or now
+        if file.tell() + len(message) > self.size or now - self.start > self.seconds:
+            self.start = now
+            return True
+        return False
+
+def setup():
+    """加载配置、初始化日志并接管异常（只在第一次创建界面时执行）"""
+    global ready
+    if ready:
+        return
+    ready = True
+    qconfig.load(CONFIG_PATH, cfg)
+    cfg.set(cfg.apiver,APIVER)
+
+    # 日志由后台线程写入（enqueue），抽选时不会被磁盘I/O拖慢；
+    # 旧日志轮换后压缩保留，不再在启动时删除，崩溃前的记录不会丢失
+    logger.remove(0)
+    logger.add(LOG_PATH, enqueue=True, rotation=LogRotation(LOG_MAX_BYTES, LOG_MAX_AGE),
+               retention=LOG_RETENTION, compression="zip", encoding="utf-8")
+    logger.add(sys.stderr, level=cfg.get(cfg.logLevel), enqueue=True)
+    atexit.register(logger.remove)  # 退出前写完队列中的日志
+    sys.excepthook = hookExceptions
+
+    logger.info("「她将自己的生活形容为一首歌，而那首歌的开始阴沉而苦涩。⌋")
+
+def hookExceptions(exc_type, exc_value, exc_tb):
+    error_details = ''.join(traceback.format_exception(exc_type, exc_value, exc_tb))
+    if "TypeError: disconnect() of all signals failed" in error_details:
+        return
+    logger.error(error_details)
+    logger.complete()  # 等后台线程把崩溃信息写入文件再弹窗，即使随后进程被结束也不会丢失
+    if not error_dialog:
+        w = ErrorDialog(error_details)
+        w.exec()
+
+class ErrorDialog(Dialog):  # 重大错误提示框
+    def __init__(self, error_details='Traceback (most recent call last):', parent=None):
+        # KeyboardInterrupt 直接 exit
+        if error_details.endswith('KeyboardInterrupt') or error_details.endswith('KeyboardInterrupt\n'):
+            sys.exit()
+
+        super().__init__(
+            'NamePicker 崩溃报告',
+            '抱歉！NamePicker 发生了严重的错误从而无法正常运行。您可以保存下方的错误信息并向他人求助。'
+            '若您认为这是程序的Bug，请点击“报告此问题”或联系开发者。',
+            parent
+        )
+        global error_dialog
+        error_dialog = True
+
+        self.is_dragging = False
+        self.drag_position = QPoint()
+        self.title_bar_height = 30
+        self.title_layout = QHBoxLayout()
+
+        self.error_log = PlainTextEdit()
+        self.ignore_error_btn = PushButton(FluentIcon.INFO, '忽略错误')
+        self.report_problem = PushButton(FluentIcon.FEEDBACK, '报告此问题')
+        self.copy_log_btn = PushButton(FluentIcon.COPY, '复制日志')
+        self.restart_btn = PrimaryPushButton(FluentIcon.SYNC, '重新启动')
+
+        self.titleLabel.setText('出错了（；´д｀）ゞ')
+        self.titleLabel.setStyleSheet("font-family: Microsoft YaHei UI; font-size: 25px; font-weight: 500;")
+        self.error_log.setReadOnly(True)
+        self.error_log.setPlainText(error_details)
+        self.error_log.setFixedHeight(200)
+        self.restart_btn.setFixedWidth(150)
+        self.yesButton.hide()
+        self.cancelButton.hide()  # 隐藏取消按钮
+        self.title_layout.setSpacing(12)
+
+        # 按钮事件
+        self.report_problem.clicked.connect(
+            lambda: QDesktopServices.openUrl(QUrl(
+                'https://github.com/NamePickerOrg/NamePicker/issues/'))
+        )
+        self.copy_log_btn.clicked.connect(self.copy_log)
+        self.restart_btn.clicked.connect(self.restart)
+        self.ignore_error_btn.clicked.connect(lambda:self.close())
+
+        self.title_layout.addWidget(self.titleLabel)
+        self.textLayout.insertLayout(0, self.title_layout)  # 页面
+        self.textLayout.addWidget(self.error_log)
+        self.buttonLayout.insertStretch(0, 1)  # 按钮布局
+        self.buttonLayout.insertWidget(0, self.copy_log_btn)
+        self.buttonLayout.insertWidget(1, self.report_problem)
+        self.buttonLayout.insertWidget(2, self.ignore_error_btn)
+        self.buttonLayout.insertStretch(1)
+        self.buttonLayout.insertWidget(5, self.restart_btn)
+
+    def restart(self):
+        if tray:
+            tray.systemTrayIcon.hide()
+        os.execl(sys.executable, sys.executable, *sys.argv)
+
+    def copy_log(self):  # 复制日志
+        QApplication.clipboard().setText(self.error_log.toPlainText())
+        Flyout.create(
+            icon=InfoBarIcon.SUCCESS,
+            title='复制成功！ヾ(^▽^*)))',
+            content="日志已成功复制到剪贴板。",
+            target=self.copy_log_btn,
+            parent=self,
+            isClosable=True,
+            aniType=FlyoutAnimationType.PULL_UP
+        )
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and event.y() <= self.title_bar_height:
+            self.is_dragging = True
+            self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
+
+    def mouseMoveEvent(self, event):
+        if self.is_dragging:
+            self.move(event.globalPos() - self.drag_position)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.is_dragging = False
+
+    def closeEvent(self, event):
+        global error_dialog
+        error_dialog = False
+        event.ignore()
+        self.hide()
+        self.deleteLater()
+
+class ResultModel(QAbstractTableModel):
+    """抽选结果表格的数据模型：只保存行号，显示到哪一行才去名单里取对应的字段"""
+    headers = ["姓名", "学号"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.roster = None
+        self.rows = []
+
+    def setResult(self, roster, rows):
+        """整体替换结果，只触发一次模型重置"""
+        self.beginResetModel()
+        self.roster = roster
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if index.column() == 0:
+            return self.roster.names[row]
+        return self.roster.nos[row]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+class LoaderSignals(QObject):
+    loaded = pyqtSignal(str, object)
+    failed = pyqtSignal(str, object)
+
+class RosterLoader(QRunnable):
+    """在线程池中读取名单并恢复抽选记录，避免阻塞界面线程"""
+
+    def __init__(self, name, seed=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.name = name
+        self.seed = seed
+        self.signals = LoaderSignals()
+
+    def run(self):
+        path, cache, journal = roster_paths(self.name)
+        try:
+            picker = Picker.load(path, cache, Journal(journal), self.seed)
+        except Exception as e:
+            self.signals.failed.emit(self.name, e)
+            return
+        self.signals.loaded.emit(self.name, picker)
+
+class Choose(QFrame):
+    reloaded = pyqtSignal(object)
+
+    def __init__(self, text: str, parent=None):
+        super().__init__(parent=parent)
+        self.picker = None
+        self.current = cfg.get(cfg.roster)
+        self.pickers = PickerPool(cfg.get(cfg.rosterCache), self.evicted)
+        self.loaders = {}
+        self.watches = {}
+        # 本次运行的随机数种子，每份名单各自派生一个独立的随机数流，种子写入各自的抽选记录
+        self.session = SeedSequence()
+        logger.info("本次运行的随机数种子：%d" % self.session.entropy)
+        cfg.rosterCache.valueChanged.connect(self.pickers.resize)
+        self.channel = ResultChannel(temp_dir, ResultPublisher())
+        self.pushChange()
+        cfg.pushResult.valueChanged.connect(self.pushChange)
+        self.reloaded.connect(self.swapname)
+        self.service = start_background_service(PLUGIN_DIR)
+
+        self.hBoxLayout = QHBoxLayout(self)
+        self.options = QVBoxLayout(self)
+
+        self.pickbn = PrimaryPushButton("点击抽选")
+        self.pickbn.clicked.connect(self.pickcb)
+        self.pickbn.setShortcut(cfg.get(cfg.chooseKey))
+        self.pickbn.adjustSize()
+        self.options.addWidget(self.pickbn,5)
+        self.loading = IndeterminateProgressBar(self)
+        self.options.addWidget(self.loading)
+
+        self.result = ResultModel(self)
+        self.table = TableView(self)
+        self.table.setBorderVisible(True)
+        self.table.setBorderRadius(8)
+        self.table.setWordWrap(False)
+        self.table.setModel(self.result)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+
+        self.rp = QWidget()
+        self.rpl = QHBoxLayout(self)
+        self.rpLabel = SubtitleLabel("名单", self)
+        self.rosterCombo = ComboBox()
+        names = roster_names()
+        if self.current not in names:
+            self.current = DEFAULT_ROSTER
+        self.rosterCombo.addItems(names)
+        self.rosterCombo.setCurrentText(self.current)
+        self.rosterCombo.currentTextChanged.connect(self.switchname)
+        self.rpl.addWidget(self.rpLabel, 10)
+        self.rpl.addWidget(self.rosterCombo, 5)
+        self.rp.setLayout(self.rpl)
+        self.options.addWidget(self.rp, 5)
+
+        self.pn = QWidget()
+        self.pnl = QHBoxLayout(self)
+        self.pnLabel = SubtitleLabel("抽选数量", self)
+        self.pickNum = SpinBox()
+        self.pickNum.setRange(1, 1)
+        self.pnl.addWidget(self.pnLabel, 10)
+        self.pnl.addWidget(self.pickNum, 5)
+        self.pn.setLayout(self.pnl)
+        self.options.addWidget(self.pn,5)
+
+        self.sep = QWidget()
+        self.sepl = QHBoxLayout(self)
+        self.seLabel = SubtitleLabel("性别偏好", self)
+        self.sexCombo = ComboBox()
+        self.sexCombo.addItems(["都抽","只抽男","只抽女","只抽特殊性别"])
+        self.sepl.addWidget(self.seLabel, 10)
+        self.sepl.addWidget(self.sexCombo, 5)
+        self.sep.setLayout(self.sepl)
+        self.options.addWidget(self.sep, 5)
+
+        self.nup = QWidget()
+        self.nul = QHBoxLayout(self)
+        self.nuLabel = SubtitleLabel("学号偏好", self)
+        self.numCombo = ComboBox()
+        self.numCombo.addItems(["都抽", "只抽单数", "只抽双数"])
+        self.nul.addWidget(self.nuLabel, 10)
+        self.nul.addWidget(self.numCombo, 5)
+        self.nup.setLayout(self.nul)
+        self.options.addWidget(self.nup, 5)
+
+        self.scrollArea = ScrollArea()
+        self.scrollArea.setWidgetResizable(True)
+        self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.opt = QWidget()
+        self.opt.setLayout(self.options)
+
+        self.hBoxLayout.addWidget(self.table,2)
+        self.hBoxLayout.addWidget(self.opt,3,Qt.AlignCenter)
+        self.setObjectName(text.replace(' ', 'Choose'))
+        self.loadname()
+        logger.info("主界面初始化完成")
+
+    def pick(self):
+        res = self.pick_many(1)
+        return res[0] if res else "尚未抽选"
+
+    def pick_many(self, k, filters=None):
+        """一次抽取k个学生，filters由make_filters生成，默认取当前界面选项"""
+        return self.picker.rows(self.draw(k, filters)) if self.picker else []
+
+    def draw(self, k, filters=None):
+        """一次抽取k个学生，返回行号列表"""
+        if self.picker is None:
+            return []
+        if filters is None:
+            filters = self.filters()
+        with span("draw"):
+            return self.picker.draw(k, filters, cfg.get(cfg.allowRepeat), cfg.get(cfg.fairDraw))
+
+    def filters(self):
+        return make_filters(sex=SEX_FILTERS[self.sexCombo.currentText()],
+                            parity=NUM_FILTERS[self.numCombo.currentText()])
+
+    def pickcb(self):
+        rows = self.draw(self.pickNum.value())
+        if not rows:
+            self.nost()
+
+        with span("render"):
+            if cfg.get(cfg.supportCS):
+                self.channel.publish(self.picker.rows(rows))
+            else:
+                if cfg.get(cfg.pushResult):
+                    self.channel.publish(self.picker.rows(rows), files=False)
+                self.result.setResult(self.picker.roster, rows)
+
+    def pushChange(self):
+        if cfg.get(cfg.pushResult):
+            try:
+                self.channel.publisher.start()
+                logger.info("结果推送已启动：%s" % self.channel.publisher.address)
+            except OSError as e:
+                logger.error("结果推送启动失败：%s" % e)
+        else:
+            self.channel.publisher.stop()
+
+    def nost(self):
+        InfoBar.error(
+            title='错误',
+            content="没有符合筛选条件的学生",
+            orient=Qt.Horizontal,
+            isClosable=True,
+            position=InfoBarPosition.BOTTOM,
+            duration=3000,
+            parent=self
+        )
+
+    def switchname(self, name):
+        """切换名单，已加载的名单直接换用，不重新读取文件"""
+        if not name or name == self.current:
+            return
+        self.current = name
+        cfg.set(cfg.roster, name)
+        picker = self.pickers.get(name)
+        if picker is None:
+            self.loadname()
+            return
+        self.showname(picker)
+        logger.info("已切换到名单 %s" % name)
+
+    def showname(self, picker):
+        self.picker = picker
+        self.pickNum.setRange(1, max(len(picker.roster), 1))
+        self.loading.hide()
+        self.pickbn.setText("点击抽选")
+        self.pickbn.setEnabled(True)
+
+    def loadname(self):
+        """在线程池中加载当前名单，加载完成前禁用抽选"""
+        name = self.current
+        self.picker = None
+        self.pickbn.setEnabled(False)
+        self.pickbn.setText("名单加载中…")
+        self.loading.show()
+        if name in self.loaders:
+            return  # 已经在加载
+        loader = RosterLoader(name, self.session.spawn(1)[0])
+        loader.signals.loaded.connect(self.loaded)
+        loader.signals.failed.connect(self.loadFailed)
+        self.loaders[name] = loader
+        QThreadPool.globalInstance().start(loader)
+
+    def loaded(self, name, picker):
+        self.loaders.pop(name, None)
+        self.pickers.put(name, picker)
+        if name not in self.watches:
+            path = roster_paths(name)[0]
+            self.watches[name] = self.service.watch(path, lambda path, name=name: self.reloadname(name, path))
+        logger.info("名单 %s 加载完成" % name)
+        if name == self.current:
+            self.showname(picker)
+
+    def evicted(self, name, picker):
+        """名单被淘汰出内存，不再监视它的文件"""
+        timer = self.watches.pop(name, None)
+        if timer:
+            self.service.cancel(timer)
+        logger.debug("名单 %s 已被移出内存" % name)
+
+    def loadFailed(self, name, e):
+        self.loaders.pop(name, None)
+        if name != self.current:
+            return
+        if not isinstance(e, FileNotFoundError) or name != DEFAULT_ROSTER:
+            self.loading.hide()
+            self.pickbn.setText("名单加载失败")
+            raise e
+        logger.warning("没有找到名单文件")
+        with open("names.csv","w",encoding="utf-8") as f:
+            st  = ["name,sex,no\n","某人,0,1"]
+            f.writelines(st)
+        w = Dialog("没有找到名单文件", "没有找到名单文件，已为您创建默认名单，请自行编辑", self)
+        w.exec()
+        self.loadname()
+
+    def reloadname(self, name, path):
+        """在后台线程中重新读取名单并建立索引，完成后交给界面线程替换"""
+        old = self.pickers.peek(name)
+        if old is None:
+            return  # 尚未加载或已被移出内存
+        try:
+            roster = load_roster(path, roster_paths(name)[1])
+        except Exception as e:
+            logger.error("重新加载名单 %s 失败：%s" % (name, e))
+            return
+        version = old.roster.version
+        changes = old.roster.diff(roster)
+        if changes is not None:
+            self.reloaded.emit((name, old, None, changes, version))
+        else:
+            self.reloaded.emit((name, old, roster, old.roster.remap(roster), version))
+
+    def swapname(self, loaded):
+        """在界面线程中更新名单，两次抽选之间完成，不影响抽选延迟
+
+        roster为None时delta是 Roster.diff 的结果，原地修改名单，只更新改动的行；
+        否则（列变化、有重复学号等）delta是 Roster.remap 的映射，整体替换名单。
+        """
+        name, old, roster, delta, version = loaded
+        if self.pickers.peek(name) is not old:
+            return  # 期间名单已被再次替换或移出内存
+        if old.roster.version != version:
+            # 比较之后名单又被原地修改过，结果已经过时，重新比较一次
+            self.service.submit(self.reloadname, name, roster_paths(name)[0])
+            return
+        if roster is None:
+            added, removed, changed = delta
+            old.apply(delta)
+            picker = old
+            logger.info("名单 %s 已更新：新增 %d 人，删除 %d 人，修改 %d 人" % (name, len(added), len(removed), len(changed)))
+        else:
+            picker = old.rebind(roster, delta)
+            self.pickers.replace(name, picker)
+            logger.info("名单 %s 已重新加载" % name)
+        if name == self.current:
+            self.picker = picker
+            self.pickNum.setRange(1, max(len(picker.roster), 1))
+
+class Settings(QFrame):
+    def __init__(self, text: str, parent=None):
+        global cfg
+        super().__init__(parent=parent)
+        self.setObjectName(text.replace(' ', 'Settings'))
+        self.stack = QStackedWidget(self)
+        self.df = QVBoxLayout(self)
+        self.scrollArea = ScrollArea()
+        self.scrollArea.setWidgetResizable(True)
+        self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.optv =QWidget()
+        self.opts = QVBoxLayout(self.optv)
+        self.tlog = PushButton(FluentIcon.DOCUMENT,"测试日志输出")
+        self.tcrash = PushButton(FluentIcon.CLOSE,"测试引发崩溃")
+        self.tlog.clicked.connect(self.testLog)
+        self.tcrash.clicked.connect(self.testCrash)
+        self.stats = PushSettingCard(
+            icon=FluentIcon.SPEED_HIGH,
+            title="性能统计",
+            content="查看加载名单、筛选、抽选和显示结果的耗时分布，可导出为JSON或Prometheus格式",
+            text="查看"
+        )
+        self.stats.clicked.connect(lambda: MetricsMsg(self.window()).exec())
+        self.cKey=SettingCard(
+            icon=FluentIcon.FONT,
+            title="抽选快捷键",
+            content="设置抽选的快捷键（不区分大小写，使用英文加号(+)串联多个按键），重启生效"
+        )
+        self.cKeyInput = LineEdit()
+        self.cKeyInput.setPlaceholderText("输入快捷键")
+        self.cKeyInput.setText(cfg.get(cfg.chooseKey))
+        self.cKey.hBoxLayout.addStretch(20)
+        self.cKey.hBoxLayout.addWidget(self.cKeyInput)
+        self.cKey.hBoxLayout.addStretch(1)
+        self.cKeyInput.textChanged.connect(lambda :cfg.set(cfg.chooseKey,self.cKeyInput.text()))
+        self.lock = PushSettingCard(
+            icon=FluentIcon.CLOSE,
+            title="锁定功能",
+            content="重新锁定已经解锁的功能",
+            text="锁定"
+        )
+        self.lock.clicked.connect(self.relock)
+        self.sets = [SubtitleLabel("常规"),
+        SwitchSettingCard(
+            configItem=cfg.allowRepeat,
+            icon=FluentIcon.LIBRARY,
+            title="允许重复点名",
+            content="允许点到重复名字"
+        ),
+        SwitchSettingCard(
+            configItem=cfg.fairDraw,
+            icon=FluentIcon.SCROLL,
+            title="按被抽到次数加权",
+            content="被抽到次数越少的学生越容易被抽到（启用后允许重复）"
+        ),
+        SwitchSettingCard(
+            configItem=cfg.supportCS,
+            icon=FluentIcon.LINK,
+            title="课表软件联动",
+            content="启用后将在ClassIsland/Class Widgets上（而非主界面）显示抽选结果，需要安装对应插件"
+        ),
+        SwitchSettingCard(
+            configItem=cfg.pushResult,
+            icon=FluentIcon.SEND,
+            title="实时推送抽选结果",
+            content="通过本地套接字（Windows上为命名管道）把每次抽选结果立即推送给联动插件"
+        ),
+        SwitchSettingCard(
+            configItem=cfg.autoStartup,
+            icon=FluentIcon.POWER_BUTTON,
+            title="开机自启",
+            content="开机时自动启动（对于非Windows系统无效）"
+        ),
+        RangeSettingCard(
+            configItem=cfg.rosterCache,
+            icon=FluentIcon.PEOPLE,
+            title="保留在内存中的名单数量",
+            content="切换名单时无需重新读取；超过该数量时，最久没有使用的名单会被移出内存"
+        ),
+        self.cKey,
+        SubtitleLabel("安全设置"),
+        HyperlinkCard(
+            icon=FluentIcon.INFO,
+            title="使用前必读",
+            content="以下设置项在初次打开时会为您生成密钥，请妥善保管\n您需要凭密钥解锁限制，如果丢失请参照文档执行操作",
+            url="https://namepicker-docs.netlify.app/guide/quickstart/lock.html",
+            text="点击查看文档"
+        ),
+        self.lock,
+        SwitchSettingCard(
+         configItem=cfg.lockConfigEdit,
+         icon=FluentIcon.HIDE,
+         title="禁用设置编辑",
+         content="启用后，将无法进行软件内设置编辑，重启生效"
+        ),
+        SubtitleLabel("调试"),
+        ComboBoxSettingCard(
+            configItem=cfg.logLevel,
+            icon=FluentIcon.DEVELOPER_TOOLS,
+            title="日志记录级别",
+            content="日志的详细程度（重启以应用更改）",
+            texts=["DEBUG", "INFO", "WARNING","ERROR"]
+        ),self.stats,
+        self.tlog,
+        self.tcrash]
+        for i in self.sets:
+            self.opts.addWidget(i)
+        self.scrollArea.setStyleSheet("QScrollArea{background: transparent; border: none}")
+        self.scrollArea.setWidget(self.optv)
+        self.optv.setStyleSheet("QWidget{background: transparent}")
+        self.df.addWidget(TitleLabel("设置"))
+        QScroller.grabGesture(self.scrollArea.viewport(), QScroller.LeftMouseButtonGesture)
+        # self.addSubInterface(self.scrollArea,"Settings","本体设置")
+        # self.pivot.setCurrentItem("Settings")
+        self.df.addWidget(self.scrollArea)
+        cfg.autoStartup.valueChanged.connect(self.startupChange)
+        cfg.lockNameEdit.valueChanged.connect(self.checkLock)
+        cfg.lockConfigEdit.valueChanged.connect(self.checkLock)
+        logger.info("设置界面初始化完成")
+
+    def startupChange(self):
+        if cfg.get(cfg.autoStartup):
+            self.setStartup()
+        else:
+            self.removeStartup()
+
+    def setStartup(self):
+        if os.name != 'nt':
+            return
+        file_path='%s/main.exe'%PLUGIN_DIR
+        icon_path = 'assets/favicon.ico'
+        startup_folder = os.path.join(os.getenv('APPDATA'), 'Microsoft', 'Windows', 'Start Menu', 'Programs', 'Startup')
+        name = os.path.splitext(os.path.basename(file_path))[0]  # 使用文件名作为快捷方式名称
+        shortcut_path = os.path.join(startup_folder, f'{name}.lnk')
+        shell = Dispatch('WScript.Shell')
+        shortcut = shell.CreateShortCut(shortcut_path)
+        shortcut.Targetpath = file_path
+        shortcut.WorkingDirectory = os.path.dirname(file_path)
+        shortcut.IconLocation = icon_path  # 设置图标路径
+        shortcut.save()
+
+    def removeStartup(self):
+        file_path = '%s/main.exe' % PLUGIN_DIR
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        startup_folder = os.path.join(os.getenv('APPDATA'), 'Microsoft', 'Windows', 'Start Menu', 'Programs', 'Startup')
+        shortcut_path = os.path.join(startup_folder, f'{name}.lnk')
+        if os.path.exists(shortcut_path):
+            os.remove(shortcut_path)
+
+    def testLog(self):
+        logger.debug("这是Debug日志")
+        logger.info("这是Info日志")
+        logger.warning("这是Warning日志")
+        logger.error("这是Error日志")
+
+    def testCrash(self):
+        raise Exception("NamePicker实际上没有任何问题，是你自己手贱引发的崩溃")
+
+    def checkLock(self):
+        global unlocked
+        if cfg.get(cfg.keyChecksum) == "0" and (cfg.get(cfg.lockNameEdit) or cfg.get(cfg.lockConfigEdit)):
+            kd = str(time.time())
+            key = bytes(kd.encode("utf-8"))
+            keymd5 = hashlib.md5(key).hexdigest()
+            cfg.set(cfg.keyChecksum,keymd5)
+            logger.info("生成密钥md5")
+            with open("KEY","w",encoding="utf-8") as f:
+                f.write(kd)
+            w = Dialog("生成完成", "由于您是初次启用安全设置，已为您在软件目录生成密钥文件（文件名：KEY），请妥善保管该文件，您将来会需要凭该文件解锁限制", self)
+            w.exec()
+            if cfg.get(cfg.lockNameEdit):
+                unlocked[0] = True
+            elif cfg.get(cfg.lockConfigEdit):
+                unlocked[1] = True
+
+    def relock(self):
+        global unlocked
+        unlocked = [False, False]
+
+class About(QFrame):
+    def __init__(self, text: str, parent=None):
+        global cfg
+        super().__init__(parent=parent)
+        self.setObjectName(text.replace(' ', 'About'))
+        self.df = QVBoxLayout(self)
+        self.about = TitleLabel("关于")
+        self.image = ImageLabel("assets/NamePicker.png")
+        self.ver = SubtitleLabel("SecPicker - Codename %s (Based on NamePicker v2.0.2d1dev)"%(CODENAME))
+        self.author = BodyLabel("By 灵魂歌手er（Github @LHGS-github）")
+        self.cpleft = BodyLabel("本软件基于GNU GPLv3获得授权")
+
+        self.linkv = QWidget()
+        self.links = QHBoxLayout(self.linkv)
+        self.ghrepo = HyperlinkButton(FluentIcon.GITHUB, "https://github.com/NamePickerOrg/NamePicker", 'GitHub Repo')
+        self.docsite = HyperlinkButton(FluentIcon.DOCUMENT,"https://namepicker-docs.netlify.app/","官方文档")
+        self.links.addWidget(self.ghrepo)
+        self.links.addWidget(self.docsite)
+
+        self.df.addWidget(self.about)
+        self.df.addWidget(self.image)
+        self.df.addWidget(self.ver)
+        self.df.addWidget(self.author)
+        self.df.addWidget(self.cpleft)
+        self.df.addWidget(self.linkv)
+        logger.info("关于界面初始化")
+
+class KeyMsg(MessageBoxBase):
+    def __init__(self, parent=None,check="NameEdit"):
+        super().__init__(parent)
+        self.check = check
+        self.titleLabel = SubtitleLabel('选择KEY文件')
+        self.explain = BodyLabel("选择KEY文件以解锁该功能")
+        self.selectButton = PrimaryPushButton("点击选择文件")
+        self.selectButton.clicked.connect(self.checkFile)
+        self.viewLayout.addWidget(self.titleLabel)
+        self.viewLayout.addWidget(self.explain)
+        self.viewLayout.addWidget(self.selectButton)
+
+    def checkFile(self):
+        global unlocked
+        options = QFileDialog.Options()
+        options |= QFileDialog.DontUseNativeDialog
+        file_filter = "All Files (*)"
+        fn = QFileDialog.getOpenFileNames(self, "选择KEY文件", "", file_filter, options=options)
+        logger.debug(fn)
+        if fn[0]:
+            with open(fn[0][0],"r",encoding="utf-8") as f:
+                key = str(f.read()).encode("utf-8")
+                logger.debug(key)
+                keymd5 = hashlib.md5(key).hexdigest()
+                logger.debug(keymd5)
+                if keymd5 == cfg.get(cfg.keyChecksum):
+                    if self.check == "NameEdit":
+                        unlocked[0] = True
+                    else:
+                        unlocked[1] = True
+                    InfoBar.success(
+                        title='校验成功',
+                        content="您已完成校验，现在应该可以使用对应功能",
+                        orient=Qt.Horizontal,
+                        isClosable=True,
+                        position=InfoBarPosition.BOTTOM,
+                        duration=3000,
+                        parent=self
+                    )
+                else:
+                    InfoBar.error(
+                        title='校验失败',
+                        content="未能成功验证，请确认是否选择了正确的文件",
+                        orient=Qt.Horizontal,
+                        isClosable=True,
+                        position=InfoBarPosition.BOTTOM,
+                        duration=3000,
+                        parent=self
+                    )
+        else:
+            InfoBar.error(
+                title='校验失败',
+                content="请选择文件",
+                orient=Qt.Horizontal,
+                isClosable=True,
+                position=InfoBarPosition.BOTTOM,
+                duration=3000,
+                parent=self
+            )
+
+class MetricsMsg(MessageBoxBase):
+    """性能统计面板"""
+    names = {"load": "读取名单", "replay": "恢复抽选记录", "filter": "筛选", "draw": "抽选", "render": "显示结果"}
+    columns = ["", "次数", "平均", "p50", "p90", "p99", "最大"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.titleLabel = SubtitleLabel("性能统计")
+        self.table = TableWidget(self)
+        self.table.setBorderVisible(True)
+        self.table.setBorderRadius(8)
+        self.table.setColumnCount(len(self.columns))
+        self.table.setHorizontalHeaderLabels(self.columns)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setMinimumSize(620, 240)
+        self.buttons = QWidget()
+        self.bl = QHBoxLayout(self.buttons)
+        self.refreshButton = PushButton(FluentIcon.SYNC, "刷新")
+        self.resetButton = PushButton(FluentIcon.DELETE, "清空")
+        self.jsonButton = PushButton(FluentIcon.SAVE, "导出JSON")
+        self.promButton = PushButton(FluentIcon.SAVE, "导出Prometheus")
+        self.refreshButton.clicked.connect(self.refresh)
+        self.resetButton.clicked.connect(self.clear)
+        self.jsonButton.clicked.connect(lambda: self.export("secpicker-metrics.json", "JSON (*.json)", metrics.to_json))
+        self.promButton.clicked.connect(lambda: self.export("secpicker-metrics.prom", "Prometheus (*.prom *.txt)", metrics.to_prometheus))
+        for b in (self.refreshButton, self.resetButton, self.jsonButton, self.promButton):
+            self.bl.addWidget(b)
+        self.viewLayout.addWidget(self.titleLabel)
+        self.viewLayout.addWidget(self.table)
+        self.viewLayout.addWidget(self.buttons)
+        self.cancelButton.hide()
+        self.yesButton.setText("关闭")
+        self.refresh()
+
+    @staticmethod
+    def fmt(sec):
+        if sec >= 1:
+            return "%.2f s" % sec
+        if sec >= 1e-3:
+            return "%.2f ms" % (sec * 1e3)
+        return "%.1f µs" % (sec * 1e6)
+
+    def refresh(self):
+        stats = metrics.summary()
+        self.table.setRowCount(len(stats))
+        for i, (name, s) in enumerate(stats.items()):
+            cells = [self.names.get(name, name), str(s["count"])] + [self.fmt(s[k]) for k in ("mean", "p50", "p90", "p99", "max")]
+            for j, text in enumerate(cells):
+                self.table.setItem(i, j, QTableWidgetItem(text))
+        self.table.resizeColumnsToContents()
+
+    def clear(self):
+        metrics.reset()
+        self.refresh()
+
+    def export(self, name, file_filter, dump):
+        fn, _ = QFileDialog.getSaveFileName(self, "导出性能统计", name, file_filter)
+        if not fn:
+            return
+        with open(fn, "w", encoding="utf-8") as f:
+            f.write(dump())
+        logger.info("性能统计已导出到 %s" % fn)
+
+class App(FluentWindow):
+    def __init__(self):
+        setup()
+        super().__init__()
+        qconfig.theme = Theme.AUTO
+        setTheme(Theme.AUTO)
+        self.Choose = Choose("随机抽选",self)
+        self.Settings = Settings("设置",self)
+        self.About = About("关于", self)
+        self.initNavigation()
+        self.initWindow()
+        self.stackedWidget.currentChanged.connect(self.checkLocker)
+        logger.info("主界面初始化")
+
+    def checkLocker(self):
+        global unlocked
+        current = self.stackedWidget.currentWidget()
+        logger.debug(current)
+        if current == self.Settings and cfg.get(cfg.lockConfigEdit) and not unlocked[1]:
+            w = KeyMsg(self, "Settings")
+            w.exec()
+            if not unlocked[1]:
+                self.switchTo(self.Choose)
+
+    def initNavigation(self):
+        self.addSubInterface(self.Choose, FluentIcon.HOME, "随机抽选")
+        self.addSubInterface(self.Settings, FluentIcon.SETTING, '设置', NavigationItemPosition.BOTTOM)
+        self.addSubInterface(self.About, FluentIcon.INFO, '关于', NavigationItemPosition.BOTTOM)
+
+    def initWindow(self):
+        self.resize(700, 500)
+        self.setWindowIcon(QIcon('assets/NamePicker.png'))
+        self.setWindowTitle('NamePicker')
+
+    def closeEvent(self, event):
+        if "noshortcut" in sys.argv:
+            sys.exit(0)
+        else:
+            self.hide()
+            event.ignore()
+
+def run():
+    """独立运行时的入口"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    main = App()
+    main.show()
+    return app.exec_()
@@ -0,0 +1,165 @@
+"""抽选记录：只追加写入的 JSON Lines 日志，用于在重启后恢复不重复抽选的进度"""
+import os
+import json
+import time
+
+class Journal:
+    """抽选记录
+
+    每行一条记录：
+      {"t": 时间戳, "f": 筛选条件, "no": [学号, ...]}           一次抽选
+      {"t": 时间戳, "f": 筛选条件, "no": [...], "repeat": true}  允许重复时的抽选（不影响进度）
+      {"t": 时间戳, "f": 筛选条件, "no": [...], "repeat": true, "weighted": true}  按被抽到次数加权的抽选
+      {"t": 时间戳, "f": 筛选条件, "reset": true}                该筛选条件下的学生全部放回，开始新一轮
+      {"t": 时间戳, "session": true, "seed": 种子, "spawn": [...]}  新会话的随机数种子（SeedSequence）
+      {"t": 时间戳, "snapshot": true, "no": [学号, ...], "counts": [[学号, 次数], ...]}
+                                                               压缩日志时写入的当前进度和每人被抽到的次数
+    抽选和放回记录带有 "c"：它属于本次会话的第几次抽选，用于重新生成抽选结果。
+    记录先缓存在内存中，调用flush()时一次性写入并fsync。
+    当文件中失效的记录远多于当前已抽到的人数时，会把旧记录归档到 .old 文件并压缩日志，
+    因此启动时恢复进度的耗时只和当前轮次的长度成正比。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.buffer = []
+        self.drawn = set()  # 当前轮次已抽到的学号
+        self.counts = {}  # 学号 -> 被抽到的总次数（包括允许重复时的抽选），用于按次数加权
+        self.records = 0  # 文件中的记录数
+        self.checked = False  # 是否已确认文件以完整的一行结尾
+
+    def session(self, seed):
+        """记录新会话的随机数种子"""
+        self.buffer.append({"t": time.time(), "session": True, "seed": seed.entropy, "spawn": list(seed.spawn_key)})
+
+    def record(self, filters, nos, repeat=False, weighted=False):
+        """记录一次抽选"""
+        rec = {"t": time.time(), "f": [list(f) for f in filters], "no": list(nos)}
+        if weighted:
+            rec["weighted"] = True
+        if repeat:
+            rec["repeat"] = True
+        else:
+            self.drawn.update(rec["no"])
+        counts = self.counts
+        for no in rec["no"]:
+            counts[no] = counts.get(no, 0) + 1
+        self.buffer.append(rec)
+
+    def reset(self, filters, nos):
+        """记录某个筛选条件开始了新一轮，nos为该筛选条件下所有学生的学号"""
+        self.drawn.difference_update(nos)
+        self.buffer.append({"t": time.time(), "f": [list(f) for f in filters], "reset": True})
+
+    def tag(self, start, call):
+        """给缓存中从start开始的记录标上它们属于第几次抽选"""
+        for rec in self.buffer[start:]:
+            rec["c"] = call
+
+    def flush(self):
+        """把缓存的记录一次性写入文件"""
+        if not self.buffer:
+            return
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.buffer)
+        if not self.checked:
+            # 上次写入时崩溃留下的半行后面先换行，否则第一条新记录会和它连成一行而被跳过
+            if self.torn():
+                data = "\n" + data
+            self.checked = True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += len(self.buffer)
+        self.buffer = []
+        if self.records > 2 * len(self.drawn) + len(self.counts) + 1024:
+            self.compact()
+
+    def torn(self):
+        """日志文件是否以不完整的一行结尾"""
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False  # 文件不存在或为空
+
+    def read(self, *paths):
+        """依次读取若干日志文件中的记录，跳过写入时崩溃留下的半行"""
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def apply(self, rec, roster):
+        """把一条记录计入当前进度；放回记录按roster中的筛选结果处理"""
+        counts = self.counts
+        if rec.get("snapshot"):
+            self.drawn = set(rec["no"])
+            counts.clear()
+            counts.update((no, n) for no, n in rec.get("counts", []))
+        elif rec.get("session"):
+            pass
+        elif rec.get("reset"):
+            filters = tuple(tuple(x) for x in rec["f"])
+            nos = roster.nos
+            try:
+                self.drawn.difference_update(nos[r] for r in roster.pool(filters).tolist())
+            except KeyError:
+                pass  # 名单中已经没有这个筛选列
+        else:
+            if not rec.get("repeat"):
+                self.drawn.update(rec["no"])
+            for no in rec["no"]:
+                counts[no] = counts.get(no, 0) + 1
+
+    def replay(self, roster):
+        """读取日志，返回当前轮次已抽到的学号（每人被抽到的次数存入counts）"""
+        self.drawn = set()
+        self.counts = {}
+        self.records = 0
+        for rec in self.read(self.path):
+            self.records += 1
+            self.apply(rec, roster)
+        return self.drawn
+
+    def compact(self):
+        """把旧记录追加到归档文件，日志中只保留一条当前进度的快照"""
+        self.flush()
+        snapshot = {"t": time.time(), "snapshot": True, "no": sorted(self.drawn),
+                     "counts": sorted(self.counts.items())}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as src, open(self.path + ".old", "a", encoding="utf-8") as dst:
+                for line in src:
+                    dst.write(line)
+        os.replace(tmp, self.path)
+        self.records = 1
+        self.checked = True
+
+
+class DeckLog:
+    """把某个Deck的抽选与换轮写入Journal"""
+
+    def __init__(self, journal, filters, roster):
+        self.journal = journal
+        self.filters = filters
+        self.roster = roster
+
+    def drawn(self, rows):
+        nos = self.roster.nos
+        self.journal.record(self.filters, [nos[r] for r in rows])
+
+    def reset(self):
+        nos = self.roster.nos
+        self.journal.reset(self.filters, [nos[r] for r in self.roster.pool(self.filters).tolist()])
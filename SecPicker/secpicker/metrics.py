@@ -0,0 +1,151 @@
+"""耗时统计：在加载名单、筛选、抽选、显示结果等关键路径上计时，记录到直方图中
+
+    with span("draw"):
+        ...
+
+每个线程写自己的直方图（只在线程第一次计时时登记一次，之后记录不加锁），
+读取时再把所有线程的直方图合并，因此计时几乎不影响被计时的代码。
+统计结果可以导出为 JSON 或 Prometheus 文本格式。
+"""
+import json
+import time
+import threading
+
+MIN_SHIFT = 10  # 最小的桶上界为 2^10 ns ≈ 1 µs
+BUCKETS = 27  # 桶上界依次翻倍，最大约 69 s，更长的也计入最后一个桶
+
+_local = threading.local()
+_tables = []  # 每个线程一份 {名称: Histogram}
+_lock = threading.Lock()  # 只在登记新线程、清空统计时使用
+
+
+class Histogram:
+    """按2的幂分桶的耗时直方图（纳秒）"""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def add(self, ns):
+        i = ns.bit_length() - MIN_SHIFT
+        self.buckets[0 if i < 0 else (i if i < BUCKETS else BUCKETS - 1)] += 1
+        self.count += 1
+        self.sum += ns
+        if ns > self.max:
+            self.max = ns
+
+    def merge(self, other):
+        for i, n in enumerate(other.buckets):
+            self.buckets[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """分位数的估计值（所在桶的上界，纳秒）"""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(1 << (i + MIN_SHIFT), self.max)
+        return self.max
+
+
+def _table():
+    table = getattr(_local, "table", None)
+    if table is None:
+        table = _local.table = {}
+        with _lock:
+            _tables.append(table)
+    return table
+
+
+def observe(name, ns):
+    """记录一次耗时（纳秒）"""
+    table = _table()
+    hist = table.get(name)
+    if hist is None:
+        hist = table[name] = Histogram()
+    hist.add(ns)
+
+
+class span:
+    """计时上下文：with span("load"): ..."""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+def snapshot():
+    """合并所有线程的直方图，返回 {名称: Histogram}"""
+    with _lock:
+        tables = list(_tables)
+    merged = {}
+    for table in tables:
+        for name, hist in list(table.items()):
+            if name not in merged:
+                merged[name] = Histogram()
+            merged[name].merge(hist)
+    return merged
+
+
+def reset():
+    """清空统计"""
+    with _lock:
+        for table in _tables:
+            table.clear()
+
+
+def summary_of(h):
+    """一个直方图的统计值，耗时单位为秒"""
+    return {
+        "count": h.count,
+        "sum": h.sum / 1e9,
+        "mean": h.sum / h.count / 1e9 if h.count else 0.0,
+        "p50": h.quantile(0.5) / 1e9,
+        "p90": h.quantile(0.9) / 1e9,
+        "p99": h.quantile(0.99) / 1e9,
+        "max": h.max / 1e9,
+    }
+
+
+def summary():
+    """{名称: {count, sum, mean, p50, p90, p99, max}}"""
+    return {name: summary_of(h) for name, h in sorted(snapshot().items())}
+
+
+def to_json():
+    data = {}
+    for name, h in sorted(snapshot().items()):
+        item = summary_of(h)
+        item["buckets"] = [[(1 << (i + MIN_SHIFT)) / 1e9, n] for i, n in enumerate(h.buckets) if n]
+        data[name] = item
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def to_prometheus(prefix="secpicker_span_seconds"):
+    """Prometheus 文本格式（histogram 类型，标签 span 为计时名称）"""
+    lines = ["# HELP %s Time spent in SecPicker operations." % prefix, "# TYPE %s histogram" % prefix]
+    for name, h in sorted(snapshot().items()):
+        seen = 0
+        for i, n in enumerate(h.buckets[:-1]):  # 最后一个桶还包含更长的耗时，只计入 +Inf
+            seen += n
+            lines.append('%s_bucket{span="%s",le="%g"} %d' % (prefix, name, (1 << (i + MIN_SHIFT)) / 1e9, seen))
+        lines.append('%s_bucket{span="%s",le="+Inf"} %d' % (prefix, name, h.count))
+        lines.append('%s_sum{span="%s"} %.9f' % (prefix, name, h.sum / 1e9))
+        lines.append('%s_count{span="%s"} %d' % (prefix, name, h.count))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,1156 @@
+"""SecPicker 抽选核心（不依赖Qt）"""
+import os
+import csv
+import json
+import mmap
+import struct
+import hashlib
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from .journal import Journal, DeckLog
+from .metrics import span
+
+rng = np.random.default_rng()  # 没有指定随机数生成器时使用
+PANDAS_THRESHOLD = 64 * 1024 * 1024  # 超过该大小的名单文件在装有pandas时改用pandas解析
+CACHE_MAGIC = b"SPRC"
+CACHE_VERSION = 2
+
+def sex_key(sex):
+    """性别筛选值：0男 1女 其余均视为特殊性别"""
+    return sex if sex == "0" or sex == "1" else "2"
+
+
+def parity_key(no):
+    """学号单双数筛选值，学号不是整数时不属于单双数"""
+    return "01"[int(no[-1]) % 2] if no.isascii() and no.isdigit() else ""
+
+
+def matches(filters, keys):
+    """keys（Roster.keys 的结果）是否满足筛选条件，keys为None表示该行已删除"""
+    return keys is not None and all(keys.get(column) == value for column, value in filters)
+
+
+def reserve(arr, n, dtype):
+    """返回长度至少为n的可写数组，arr[:len(arr)] 的内容保留
+
+    容量不够时按倍数扩容，逐行追加的均摊代价为 O(1)；
+    只读数组（从内存映射的缓存读出）第一次修改时复制一份。
+    """
+    cap = 0 if arr is None else len(arr)
+    if cap >= n and arr.flags.writeable:
+        return arr
+    out = np.zeros(cap if cap >= n else max(n, 2 * cap), dtype=dtype)
+    if cap:
+        out[:cap] = arr
+    return out
+
+
+class Roster:
+    """名单：按列存储所有字段，以学号建立行索引，并为筛选条件预建位图
+
+    add / remove / update 原地修改名单，只更新改动的行：行号保持不变，
+    删除的行留作空位（记在removed中），新增的学生追加到末尾。
+    每次修改的代价与名单长度无关：位图按位修改，受影响的行号数组只是从缓存中删去，
+    下次用到时才重建（O(n)，多次修改之后只重建一次）。
+    位图的长度可能大于length（预留的容量），只有前length位有效。
+    """
+
+    def __init__(self, columns, bitmaps=None, pools=None):
+        self.columns = columns  # 列名 -> 该列所有值（均为字符串）
+        self.names = columns["name"]
+        self.nos = columns["no"]
+        self.length = len(self.names)
+        self.bitmaps = {}  # 筛选列 -> {取值: 布尔数组}
+        self.pools = {}  # 筛选条件 -> 满足条件的行号数组
+        self.removed = set()  # 已删除的行号
+        self.version = 0  # 每次原地修改后加1
+        self._index = None
+        if bitmaps is not None:
+            # 从缓存恢复时直接使用预先计算好的位图和行号数组
+            self.bitmaps = bitmaps
+            self.pools = pools or {}
+            return
+        sex = np.array(columns["sex"], dtype=object)
+        sex = np.where((sex == "0") | (sex == "1"), sex, "2")  # 与 sex_key 一致
+        parity = np.array([parity_key(no) for no in self.nos], dtype=object)
+        self.add_filter("sex", sex)
+        self.add_filter("parity", parity)
+        for s in (None, "0", "1", "2"):
+            for p in (None, "0", "1"):
+                self.pool(make_filters(sex=s, parity=p))
+
+    def __len__(self):
+        """在册的学生数（不含已删除的行）"""
+        return self.length - len(self.removed)
+
+    @property
+    def index(self):
+        """学号 -> 行号（学号重复时取第一行），第一次用到时才建立"""
+        if self._index is None:
+            if self.removed:
+                removed = self.removed
+                self._index = {no: r for r, no in reversed(list(enumerate(self.nos))) if r not in removed}
+            else:
+                self._index = dict(zip(reversed(self.nos), range(self.length - 1, -1, -1)))
+        return self._index
+
+    def add_filter(self, column, values=None):
+        """为某一列的每个取值建立位图，values默认取名单中的同名列"""
+        if values is None:
+            values = np.array(self.columns[column])
+        self.bitmaps[column] = {v: values == v for v in np.unique(values).tolist()}
+        if self.removed:
+            dead = np.fromiter(self.removed, dtype=np.int64, count=len(self.removed))
+            for bitmap in self.bitmaps[column].values():
+                bitmap[dead] = False
+        self.pools = {k: v for k, v in self.pools.items() if column not in dict(k)}
+
+    def pool(self, filters=()):
+        """获取满足筛选条件的行号数组（结果会被缓存）"""
+        if filters in self.pools:
+            return self.pools[filters]
+        with span("filter"):
+            mask = np.ones(self.length, dtype=bool)
+            if self.removed:
+                mask[list(self.removed)] = False
+            for column, value in filters:
+                bitmap = self.bitmaps[column].get(value)
+                if bitmap is None:
+                    mask[:] = False
+                    break
+                mask &= bitmap[:self.length]
+            self.pools[filters] = np.flatnonzero(mask)
+        return self.pools[filters]
+
+    def remap(self, other):
+        """按学号把本名单的行号映射到另一份名单的行号，对方没有的学生映射为-1"""
+        find = other.index.get
+        mapping = np.fromiter((find(no, -1) for no in self.nos), dtype=np.int64, count=self.length)
+        if self.removed:
+            mapping[list(self.removed)] = -1
+        return mapping
+
+    def row(self, row):
+        """获取某一行的全部字段"""
+        tmp = {"name": self.names[row], "no": self.nos[row]}
+        for k, col in self.columns.items():
+            if k == "name" or k == "no":
+                continue
+            tmp[k] = col[row]
+        return tmp
+
+    def find(self, no):
+        """按学号查找行号，找不到时返回None"""
+        return self.index.get(no)
+
+    def keys(self, row):
+        """某一行在各个筛选列上的取值，已删除的行返回None"""
+        if row in self.removed:
+            return None
+        keys = {}
+        for column in self.bitmaps:
+            if column == "sex":
+                keys[column] = sex_key(self.columns["sex"][row])
+            elif column == "parity":
+                keys[column] = parity_key(self.nos[row])
+            else:
+                keys[column] = self.columns[column][row]
+        return keys
+
+    def add(self, record):
+        """新增一个学生（record为 列名 -> 值，缺少的列为空），返回 (行号, None)"""
+        no = str(record["no"])
+        if no in self.index:
+            raise ValueError("学号 %s 已存在" % no)
+        row = self.length
+        for k, col in self.columns.items():
+            col.append(str(record.get(k, "")))
+        self.length += 1
+        self.index[no] = row
+        for values in self.bitmaps.values():
+            for v, bitmap in values.items():
+                values[v] = reserve(bitmap, self.length, bool)
+        self._move(row, None, self.keys(row))
+        return row, None
+
+    def remove(self, no):
+        """删除学号为no的学生，返回 (行号, 删除前的筛选取值)"""
+        row = self.index.pop(no)
+        before = self.keys(row)
+        self.removed.add(row)
+        self._move(row, before, None)
+        return row, before
+
+    def update(self, no, record):
+        """修改学号为no的学生的若干字段（可以包括学号本身），返回 (行号, 修改前的筛选取值)"""
+        row = self.index[no]
+        new = str(record.get("no", no))
+        if new != no and new in self.index:
+            raise ValueError("学号 %s 已存在" % new)
+        before = self.keys(row)
+        for k, v in record.items():
+            if k in self.columns:
+                self.columns[k][row] = str(v)
+        if new != no:
+            del self.index[no]
+            self.index[new] = row
+        self._move(row, before, self.keys(row))
+        return row, before
+
+    def _move(self, row, before, after):
+        """某一行的筛选取值从before变为after后，更新位图和已缓存的行号数组"""
+        self.version += 1
+        for column, values in self.bitmaps.items():
+            old = before[column] if before else None
+            new = after[column] if after else None
+            if old == new:
+                continue
+            if old is not None:
+                values[old] = reserve(values[old], self.length, bool)
+                values[old][row] = False
+            if new is not None:
+                values[new] = reserve(values.get(new), self.length, bool)
+                values[new][row] = True
+        # 受影响的行号数组直接丢弃，下次 pool() 时再从位图重建，修改本身不复制数组
+        for filters in [f for f in self.pools if matches(f, before) != matches(f, after)]:
+            del self.pools[filters]
+
+    def diff(self, other):
+        """与另一份名单（通常是重新读取的CSV）按学号比较，返回 (新增的学生, 删除的学号, 修改过的学生)
+
+        新增和修改的学生以 row() 的格式给出。两份名单的列不同或有重复学号时返回None，只能整体替换。
+        """
+        if list(other.columns) != list(self.columns):
+            return None
+        mine, theirs = self.index, other.index
+        if len(mine) != len(self) or len(theirs) != other.length:
+            return None
+        pairs = [(self.columns[k], other.columns[k]) for k in self.columns]
+        added = []
+        changed = []
+        for r, no in enumerate(other.nos):
+            m = mine.get(no)
+            if m is None:
+                added.append(other.row(r))
+            elif any(a[m] != b[r] for a, b in pairs):
+                changed.append(other.row(r))
+        removed = [no for r, no in enumerate(self.nos) if no not in theirs and r not in self.removed]
+        return added, removed, changed
+
+
+def load_csv(path, encoding="utf-8-sig"):
+    """流式读取名单CSV，逐行直接写入各列，不产生中间副本"""
+    if os.path.getsize(path) > PANDAS_THRESHOLD:
+        try:
+            import pandas as pd
+        except ImportError:
+            pass
+        else:
+            df = pd.read_csv(path, sep=",", header=0, dtype=str, keep_default_na=False, encoding=encoding)
+            return Roster({str(k): df[k].tolist() for k in df.columns})
+    with open(path, "r", encoding=encoding, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        cols = [[] for _ in header]
+        appends = [c.append for c in cols]
+        width = len(header)
+        for line in reader:
+            if not line:
+                continue
+            if len(line) < width:
+                line += [""] * (width - len(line))
+            for append, v in zip(appends, line):
+                append(v)
+    return Roster(dict(zip(header, cols)))
+
+
+def file_stamp(path):
+    """名单文件的修改时间、大小和内容哈希，用于判断缓存是否失效"""
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return {"mtime": st.st_mtime_ns, "size": st.st_size, "sha1": h.hexdigest()}
+
+
+def save_cache(roster, path, stamp):
+    """把名单及其位图、行号数组写成二进制缓存（先写临时文件再替换）
+
+    格式：magic + 版本号 + 头部长度 + JSON头部，之后是按8字节对齐的数据段。
+    字符串列以\0分隔的UTF-8存储，位图和行号数组直接存原始字节，可以内存映射读取。
+    """
+    blobs = []
+    offset = 0
+
+    def put(data):
+        nonlocal offset
+        pad = -offset % 8
+        blobs.append(b"\0" * pad + data)
+        offset += pad
+        start = offset
+        offset += len(data)
+        return [start, len(data)]
+
+    # filters 单独记下所有筛选列：没有任何取值的列（例如空名单）在 bitmaps 中不占条目
+    header = {"source": stamp, "length": roster.length, "columns": [], "filters": list(roster.bitmaps),
+              "bitmaps": [], "pools": []}
+    for k, col in roster.columns.items():
+        header["columns"].append([k] + put("\0".join(col).encode("utf-8")))
+    for column, values in roster.bitmaps.items():
+        for v, bitmap in values.items():
+            header["bitmaps"].append([column, v] + put(np.ascontiguousarray(bitmap[:roster.length], dtype=bool).tobytes()))
+    for filters, rows in roster.pools.items():
+        header["pools"].append([[list(f) for f in filters]] + put(np.ascontiguousarray(rows, dtype=np.int64).tobytes()))
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    prefix = CACHE_MAGIC + struct.pack("<II", CACHE_VERSION, len(head)) + head
+    prefix += b"\0" * (-len(prefix) % 8)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # 临时文件名不能固定，多个进程可能同时编译同一份名单
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".secpicker-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(prefix)
+            for b in blobs:
+                f.write(b)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_cache(path, stamp):
+    """读取二进制缓存，缓存不存在、损坏或与名单文件不一致时返回None
+
+    成功时返回的名单直接引用内存映射中的位图和行号数组，映射在名单被回收之前一直保持；
+    失败时立即关闭映射，以免占用文件。
+    """
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    roster = None
+    try:
+        if mm[:4] != CACHE_MAGIC:
+            return None
+        version, hlen = struct.unpack_from("<II", mm, 4)
+        if version != CACHE_VERSION:
+            return None
+        header = json.loads(mm[12:12 + hlen].decode("utf-8"))
+        if header["source"] != stamp:
+            return None
+        base = 12 + hlen
+        base += -base % 8
+        length = header["length"]
+        columns = {}
+        for k, start, n in header["columns"]:
+            columns[k] = mm[base + start:base + start + n].decode("utf-8").split("\0") if length else []
+        bitmaps = {column: {} for column in header["filters"]}
+        for column, v, start, n in header["bitmaps"]:
+            bitmaps.setdefault(column, {})[v] = np.frombuffer(mm, dtype=bool, count=n, offset=base + start)
+        pools = {}
+        for filters, start, n in header["pools"]:
+            pools[tuple(tuple(f) for f in filters)] = np.frombuffer(mm, dtype=np.int64, count=n // 8, offset=base + start)
+        roster = Roster(columns, bitmaps, pools)
+        return roster
+    except (ValueError, KeyError, struct.error):
+        return None
+    finally:
+        if roster is None:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # 已经有数组引用了映射，等它们被回收时再释放
+
+
+def cache_file(cache_path, stamp):
+    """某个版本的名单对应的缓存文件：names.cache -> names.<16位哈希>.cache
+
+    已加载的名单一直映射着自己的缓存文件，而 Windows 上不能替换被映射的文件，
+    所以名单文件变化后写入新的文件名，不覆盖旧缓存。
+    """
+    root, ext = os.path.splitext(cache_path)
+    key = hashlib.sha1(json.dumps(stamp, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return "%s.%s%s" % (root, key, ext)
+
+
+def prune_cache(cache_path, keep):
+    """删除同一份名单的其他版本的缓存（以及旧版本使用的 cache_path 本身），仍被映射而删不掉的留到下次"""
+    root, ext = os.path.splitext(cache_path)
+    directory = os.path.dirname(root) or "."
+    prefix = os.path.basename(root) + "."
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        key = name[len(prefix):len(name) - len(ext)]
+        stale = name == os.path.basename(cache_path) or (
+            name.startswith(prefix) and name.endswith(ext) and len(key) == 16
+            and all(c in "0123456789abcdef" for c in key))
+        if stale and name != os.path.basename(keep):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def load_roster(path, cache_path=None):
+    """读取名单，名单文件未变化时直接使用二进制缓存，跳过CSV解析"""
+    with span("load"):
+        if cache_path is None:
+            return load_csv(path)
+        stamp = file_stamp(path)
+        versioned = cache_file(cache_path, stamp)
+        roster = load_cache(versioned, stamp)
+        if roster is not None:
+            return roster
+        roster = load_csv(path)
+        try:
+            save_cache(roster, versioned, stamp)
+        except OSError:
+            pass
+        else:
+            prune_cache(cache_path, versioned)
+        return roster
+
+
+def make_filters(**kw):
+    """把 列名=取值 形式的筛选条件整理为可哈希的元组，取值为None表示不筛选该列"""
+    return tuple(sorted((k, v) for k, v in kw.items() if v is not None))
+
+
+class Bitset:
+    """定长位集合，每行只占1位"""
+
+    def __init__(self, n):
+        self.n = n
+        self.bits = bytearray((n + 7) // 8)
+        self.view = np.frombuffer(self.bits, dtype=np.uint8)
+
+    def __contains__(self, i):
+        return self.bits[i >> 3] >> (i & 7) & 1 == 1
+
+    def add(self, i):
+        self.bits[i >> 3] |= 1 << (i & 7)
+
+    def discard(self, i):
+        self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def grow(self, n):
+        """扩大到n位，新增的位为0；bytearray按倍数预留空间，逐行扩大的均摊代价为 O(1)"""
+        if n <= self.n:
+            return
+        extra = (n + 7) // 8 - len(self.bits)
+        if extra > 0:
+            self.view = None  # 先释放对缓冲区的引用，bytearray才能扩大
+            self.bits.extend(bytes(extra))
+            self.view = np.frombuffer(self.bits, dtype=np.uint8)
+        self.n = n
+
+    def test(self, rows):
+        """批量判断，返回布尔数组"""
+        rows = np.asarray(rows, dtype=np.int64)
+        return (self.view[rows >> 3] >> (rows & 7) & 1).astype(bool)
+
+    def update(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        np.bitwise_or.at(self.view, rows >> 3, (1 << (rows & 7)).astype(np.uint8))
+
+    def difference_update(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        np.bitwise_and.at(self.view, rows >> 3, ~(1 << (rows & 7)).astype(np.uint8))
+
+    def clear(self):
+        self.view[:] = 0
+
+    def rows(self):
+        """所有已设置的位置"""
+        return np.flatnonzero(np.unpackbits(self.view, bitorder="little")[:self.n])
+
+
+class Uniforms:
+    """从随机数生成器中成批取出 [0, 1) 的均匀随机数，逐个取用比每次调用 Generator.random() 快"""
+
+    def __init__(self, rng, block=256):
+        self.rng = rng
+        self.block = block
+        self.buffer = []
+
+    def __call__(self):
+        if not self.buffer:
+            self.buffer = self.rng.random(self.block).tolist()
+            self.buffer.reverse()
+        return self.buffer.pop()
+
+
+class Deck:
+    """洗牌抽选（部分 Fisher–Yates）：每次抽选 O(1)
+
+    某个学生是否已被抽到记录在所有Deck共用的位集合drawn中，
+    因此切换筛选条件后，之前抽到的学生依然不会被重复抽到；
+    被其他筛选条件抽走的行在洗牌时直接跳过。
+    名单修改时 add / remove 为均摊 O(1)：第一次移除行时建立 行号 -> 位置 的索引（O(n)，只建一次），
+    之后抽选和洗牌时顺带维护它。
+    """
+
+    def __init__(self, rows, drawn=None, log=None, rng=rng):
+        self.buf = np.array(rows, dtype=np.int64)  # rows 是它的前一段，新增行时按倍数扩容
+        self.rows = self.buf
+        self.pos = None  # 行号 -> 在rows中的位置，第一次移除行时才建立；只有rows[pos[r]] == r时才有效
+        self.rng = rng
+        self.random = Uniforms(rng)
+        self.left = len(self.rows)  # rows[:left] 为本轮还没有轮到的行
+        self.drawn = drawn if drawn is not None else Bitset(int(self.rows.max()) + 1 if len(self.rows) else 0)
+        self.log = log  # 抽选记录，需提供 drawn(rows) 和 reset()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def draw(self):
+        """不重复抽取一行，池中所有人都被抽到后自动开始新一轮"""
+        rows = self.rows
+        if not len(rows):
+            return None
+        drawn = self.drawn
+        random = self.random
+        while True:
+            if self.left == 0:
+                self.refill()
+            j = int(random() * self.left)
+            self.left -= 1
+            row = int(rows[j])
+            rows[j] = rows[self.left]
+            rows[self.left] = row
+            if self.pos is not None:
+                self.pos[rows[j]] = j
+                self.pos[row] = self.left
+            if row not in drawn:
+                break
+        drawn.add(row)
+        if self.log:
+            self.log.drawn([row])
+        return row
+
+    def draw_many(self, k):
+        """不重复地一次抽取k行（向量化），本轮不足时接着抽下一轮"""
+        rows = self.rows
+        n = len(rows)
+        out = []
+        while n and k > 0:
+            if self.left == 0:
+                self.refill()
+            m = min(k, self.left)
+            start = self.left - m
+            sel = self.rng.choice(self.left, m, replace=False)
+            picked = rows[sel]
+            # 把未被选中的尾部元素挪到被选中元素空出的位置，再把选中的放到尾部
+            inside = sel[sel >= start]
+            outside = sel[sel < start]
+            free = np.setdiff1d(np.arange(start, self.left), inside, assume_unique=True)
+            rows[outside] = rows[free]
+            rows[start:self.left] = picked
+            if self.pos is not None:
+                self.pos[rows[outside]] = outside
+                self.pos[picked] = np.arange(start, self.left)
+            self.left = start
+            picked = picked[~self.drawn.test(picked)]
+            if not len(picked):
+                continue
+            self.drawn.update(picked)
+            if self.log:
+                self.log.drawn(picked.tolist())
+            out.append(picked)
+            k -= len(picked)
+        return np.concatenate(out) if out else rows[:0].copy()
+
+    def sample(self):
+        """允许重复地抽取一行"""
+        if not len(self.rows):
+            return None
+        return int(self.rows[int(self.random() * len(self.rows))])
+
+    def sample_many(self, k):
+        """允许跨批次重复地抽取k行，同一批次内尽量不重复"""
+        n = len(self.rows)
+        if not n:
+            return self.rows[:0].copy()
+        if k <= n:
+            return self.rows[self.rng.choice(n, k, replace=False)]
+        idx = np.concatenate([self.rng.permutation(n) for _ in range(-(-k // n))])
+        return self.rows[idx[:k]]
+
+    def refill(self):
+        """本轮洗完后重新洗牌：池中还有没被抽到的人（被其他筛选条件放回）就只洗这些人，否则开始新一轮"""
+        rows = self.rows
+        mask = self.drawn.test(rows)
+        if mask.all():
+            self.reset()
+            return
+        rows[:] = np.concatenate([rows[~mask], rows[mask]])
+        if self.pos is not None:
+            self.pos[rows] = np.arange(len(rows))
+        self.left = int((~mask).sum())
+
+    def reset(self):
+        """放回池中所有已抽到的行，开始新一轮"""
+        self.drawn.difference_update(self.rows)
+        self.left = len(self.rows)
+        if self.log:
+            self.log.reset()
+
+    def add(self, row):
+        """把新的一行放进本轮还没轮到的部分"""
+        n = len(self.rows)
+        self.buf = reserve(self.buf, n + 1, np.int64)
+        rows = self.rows = self.buf[:n + 1]
+        pos = self.pos
+        if pos is not None:
+            pos = self.pos = reserve(pos, row + 1, np.int64)
+        if self.left < n:
+            rows[n] = rows[self.left]
+            if pos is not None:
+                pos[rows[n]] = n
+        rows[self.left] = row
+        if pos is not None:
+            pos[row] = self.left
+        self.left += 1
+
+    def remove(self, row):
+        """从池中去掉一行，用末尾的行补上空位，不重新洗牌"""
+        rows = self.rows
+        if self.pos is None:
+            self.pos = np.zeros(int(rows.max()) + 1 if len(rows) else 0, dtype=np.int64)
+            self.pos[rows] = np.arange(len(rows))
+        pos = self.pos
+        if row >= len(pos):
+            return
+        j = int(pos[row])
+        if j >= len(rows) or rows[j] != row:
+            return  # 不在池中
+        last = len(rows) - 1
+        if j < self.left:
+            # 先用本轮未轮到部分的最后一行补上，空位移到已轮到的部分
+            self.left -= 1
+            rows[j] = rows[self.left]
+            pos[rows[j]] = j
+            j = self.left
+        if j != last:
+            rows[j] = rows[last]
+            pos[rows[j]] = j
+        self.rows = rows[:last]
+
+
+def fair_weight(counts):
+    """被抽到次数越少权重越高"""
+    return 1.0 / (1.0 + np.asarray(counts, dtype=np.float64))
+
+
+class Fenwick:
+    """树状数组（Fenwick tree）：修改单个权重和按权重抽样都是 O(log n)
+
+    建树用numpy向量化；树本身存为Python列表，逐个元素读写比numpy标量快得多。
+    """
+
+    def __init__(self, weights, rng=rng):
+        self.rng = rng
+        self.n = len(weights)
+        self.top = 1 << (self.n.bit_length() - 1) if self.n else 0
+        self.rebuild(weights)
+
+    def rebuild(self, weights=None):
+        """按weights重新建树（O(n)），同时消除浮点累计误差"""
+        w = np.asarray(self.weights if weights is None else weights, dtype=np.float64)
+        c = np.concatenate([[0.0], np.cumsum(w)])
+        i = np.arange(1, self.n + 1)
+        tree = np.zeros(self.n + 1)
+        tree[1:] = c[i] - c[i - (i & -i)]  # tree[i] 为 weights[i-lowbit(i), i) 之和
+        self.tree = tree.tolist()
+        self.weights = w.tolist()
+        self.total = float(c[-1])
+
+    def set(self, pos, weight):
+        delta = weight - self.weights[pos]
+        if not delta:
+            return
+        self.weights[pos] = weight
+        self.total += delta
+        tree = self.tree
+        n = self.n
+        i = pos + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def append(self, weight):
+        """在末尾增加一个位置，O(log n)"""
+        tree = self.tree
+        self.n += 1
+        i = self.n
+        s = weight
+        j = i - 1
+        while j > i - (i & -i):
+            s += tree[j]
+            j -= j & -j
+        tree.append(s)
+        self.weights.append(weight)
+        self.total += weight
+        if self.n >= 2 * self.top:
+            self.top = 2 * self.top or 1
+
+    def find(self, u):
+        """返回前缀和第一次超过u的位置"""
+        tree = self.tree
+        n = self.n
+        pos = 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= u:
+                pos = nxt
+                u -= tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+    def sample(self):
+        pos = self.find(self.rng.random() * self.total)
+        if self.weights[pos] <= 0:
+            # 浮点误差落到了权重为0的位置，重建后再抽一次
+            self.rebuild()
+            pos = self.find(self.rng.random() * self.total)
+        return pos
+
+
+class WeightedDeck:
+    """按权重抽选：在筛选池上建一棵树状数组，权重由 fair_weight(被抽到次数) 给出
+
+    每抽到一个人只需要 O(log n) 修改他的权重，不需要重建。
+    名单修改时，移出池的行权重置0，新进入池的行追加到树的末尾，同样是 O(log n)。
+    """
+
+    def __init__(self, rows, counts, rng=rng):
+        self.buf = np.array(rows, dtype=np.int64)
+        self.rows = self.buf
+        self.sorted = len(self.rows)  # rows[:sorted] 为建树时的筛选池，行号升序
+        self.extra = {}  # 之后追加到末尾的行 -> 位置
+        self.dead = set()  # 已移出池、权重为0的行
+        self.tree = Fenwick(fair_weight(counts[self.rows]), rng)
+        n = self.sorted
+        # 池是连续的行号（例如不筛选）时，位置可以直接算出来
+        self.first = int(self.rows[0]) if n and self.rows[-1] - self.rows[0] == n - 1 else None
+
+    def __len__(self):
+        return len(self.rows) - len(self.dead)
+
+    def position(self, row):
+        """行号在池中的位置，不在池中（包括已移出池）时返回-1"""
+        return -1 if row in self.dead else self.slot(row)
+
+    def slot(self, row):
+        """行号在树中的位置，已移出池的行仍保留原来的位置，从未进入池时返回-1"""
+        rows = self.rows
+        n = self.sorted
+        if self.first is not None:
+            i = row - self.first
+            if 0 <= i < n:
+                return i
+        else:
+            i = int(np.searchsorted(rows[:n], row))
+            if i < n and rows[i] == row:
+                return i
+        return self.extra.get(row, -1)
+
+    def update(self, rows, weights):
+        """修改若干行的权重，不在池中的行忽略"""
+        n = self.sorted
+        if self.first is not None:
+            pos = np.asarray(rows, dtype=np.int64) - self.first
+            ok = (pos >= 0) & (pos < n)
+        else:
+            pos = np.searchsorted(self.rows[:n], rows)
+            ok = pos < n
+            ok[ok] = self.rows[pos[ok]] == np.asarray(rows)[ok]
+        tree = self.tree
+        dead = self.dead
+        if dead:
+            # 已移出池的行权重必须保持为0
+            ok[ok] = [r not in dead for r in np.asarray(rows)[ok].tolist()]
+        for p, w in zip(pos[ok].tolist(), np.asarray(weights)[ok].tolist()):
+            tree.set(p, w)
+        if self.extra:
+            for r, w in zip(np.asarray(rows).tolist(), np.asarray(weights).tolist()):
+                p = self.extra.get(r)
+                if p is not None and r not in dead:
+                    tree.set(p, w)
+
+    def add(self, row, weight):
+        """把一行加入池中"""
+        pos = self.slot(row)
+        if pos < 0:
+            pos = len(self.rows)
+            self.buf = reserve(self.buf, pos + 1, np.int64)
+            self.rows = self.buf[:pos + 1]
+            self.rows[pos] = row
+            self.extra[row] = pos
+            self.tree.append(0.0)
+        elif row not in self.dead:
+            return
+        self.dead.discard(row)
+        self.tree.set(pos, weight)
+
+    def remove(self, row):
+        """把一行移出池（权重置0）"""
+        pos = self.slot(row)
+        if pos < 0 or row in self.dead:
+            return
+        self.dead.add(row)
+        self.tree.set(pos, 0.0)
+
+    def sample_many(self, k):
+        """按权重抽取k行，同一批次内尽量不重复（抽到的人暂时把权重置0）"""
+        tree = self.tree
+        rows = self.rows
+        n = len(self)
+        out = []
+        taken = []
+        for _ in range(k):
+            if len(taken) == n:
+                for pos, w in taken:
+                    tree.set(pos, w)
+                taken = []
+            pos = tree.sample()
+            out.append(int(rows[pos]))
+            taken.append((pos, tree.weights[pos]))
+            tree.set(pos, 0.0)
+        for pos, w in reversed(taken):
+            tree.set(pos, w)
+        return out
+
+
+class DrawState:
+    """一份名单的抽选进度：以行号为键的位集合、每个学生被抽到的次数，以及每个筛选条件的Deck"""
+
+    def __init__(self, roster, log=None, rng=rng):
+        self.roster = roster
+        self.rng = rng  # 同一份名单的所有Deck共用一个随机数生成器
+        self.drawn = Bitset(roster.length)
+        self.counts = np.zeros(roster.length, dtype=np.int64)
+        self.decks = {}  # 筛选条件 -> Deck
+        self.weighted = {}  # 筛选条件 -> WeightedDeck
+        self.log = log  # 根据筛选条件生成Deck的抽选记录，log(filters) -> DeckLog
+
+    def deck(self, filters):
+        """获取某个筛选条件对应的Deck，切换筛选条件只是一次字典查找"""
+        if filters not in self.decks:
+            self.decks[filters] = Deck(self.roster.pool(filters), self.drawn, self.log(filters) if self.log else None, self.rng)
+        return self.decks[filters]
+
+    def weighted_deck(self, filters):
+        """获取某个筛选条件对应的按权重抽选的Deck，第一次使用时建树"""
+        if filters not in self.weighted:
+            self.weighted[filters] = WeightedDeck(self.roster.pool(filters), self.counts, self.rng)
+        return self.weighted[filters]
+
+    def called(self, rows):
+        """记录这些行又被抽到了一次，并更新所有按权重抽选的Deck"""
+        counts = self.counts
+        if len(rows) == 1:
+            row = rows[0]
+            counts[row] += 1
+            if self.weighted:
+                w = 1.0 / (1.0 + float(counts[row]))
+                for deck in self.weighted.values():
+                    pos = deck.position(row)
+                    if pos >= 0:
+                        deck.tree.set(pos, w)
+            return
+        if not len(rows):
+            return
+        np.add.at(counts, rows, 1)
+        if self.weighted:
+            rows = np.unique(rows)
+            weights = fair_weight(counts[rows])
+            for deck in self.weighted.values():
+                deck.update(rows, weights)
+
+    def rebind(self, roster, mapping, log=None, rng=rng):
+        """换成新的名单，mapping由 Roster.remap 预先算好，仍在名单中的学生保留抽选进度"""
+        state = DrawState(roster, log, rng)
+        rows = mapping[self.drawn.rows()]
+        rows = rows[rows >= 0]
+        if len(rows):
+            state.drawn.update(rows)
+        kept = mapping >= 0
+        state.counts[mapping[kept]] = self.counts[:len(mapping)][kept]
+        return state
+
+    def move(self, row, before, after):
+        """名单中某一行的筛选取值从before变为after（None表示新增或删除）后，原地更新抽选进度和各个Deck"""
+        length = self.roster.length
+        self.drawn.grow(length)
+        self.counts = reserve(self.counts, length, np.int64)
+        if after is None:
+            self.drawn.discard(row)
+            self.counts[row] = 0
+        for filters, deck in self.decks.items():
+            was, now = matches(filters, before), matches(filters, after)
+            if was and not now:
+                deck.remove(row)
+            elif now and not was:
+                deck.add(row)
+        if self.weighted:
+            weight = float(fair_weight(self.counts[row]))
+            for filters, deck in self.weighted.items():
+                was, now = matches(filters, before), matches(filters, after)
+                if was and not now:
+                    deck.remove(row)
+                elif now and not was:
+                    deck.add(row, weight)
+
+    def restore(self, nos):
+        """根据学号恢复已抽到的学生"""
+        rows = [r for r in map(self.roster.find, nos) if r is not None]
+        if rows:
+            self.drawn.update(rows)
+
+    def recount(self, counts):
+        """根据 {学号: 被抽到次数} 恢复每个学生被抽到的次数"""
+        find = self.roster.find
+        for no, n in counts.items():
+            row = find(no)
+            if row is not None:
+                self.counts[row] = n
+
+
+class Picker:
+    """抽选引擎：一份名单、它的抽选进度、随机数生成器和（可选的）抽选记录
+
+    不依赖Qt，界面、命令行和性能测试都通过它抽选：
+      picker = Picker.load("names.csv")
+      picker.pick_many(5, make_filters(sex="1"))
+    每个Picker有自己的随机数生成器，种子（numpy SeedSequence）会写入抽选记录，
+    因此可以用 regenerate() 逐次重新生成当时的抽选结果。
+    """
+
+    def __init__(self, roster, journal=None, seed=None):
+        self.roster = roster
+        self.journal = journal
+        self.seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed)
+        self.calls = 0  # 本次会话的抽选次数，写入抽选记录以便重新生成时区分每次抽选
+        self.state = DrawState(roster, self._decklog if journal else None, self.rng)
+        if journal:
+            journal.session(self.seed)
+
+    @classmethod
+    def load(cls, path, cache_path=None, journal=None, seed=None):
+        """读取名单，并按抽选记录恢复进度"""
+        roster = load_roster(path, cache_path)
+        picker = cls(roster, journal, seed)
+        if journal:
+            with span("replay"):
+                picker.state.restore(journal.replay(roster))
+                picker.state.recount(journal.counts)
+        return picker
+
+    def _decklog(self, filters):
+        return DeckLog(self.journal, filters, self.roster)
+
+    def draw(self, k=1, filters=(), repeat=False, weighted=False):
+        """抽取k个学生，返回行号列表
+
+        repeat为True时允许与之前的结果重复；
+        weighted为True时按被抽到的次数加权（次数越少越容易抽到），同样允许重复。
+        """
+        journal = self.journal
+        if journal:
+            mark = len(journal.buffer)
+        if weighted:
+            deck = self.state.weighted_deck(filters)
+            if not len(deck) or k <= 0:
+                return []
+            rows = deck.sample_many(k)
+            if journal:
+                nos = self.roster.nos
+                journal.record(filters, [nos[i] for i in rows], repeat=True, weighted=True)
+        else:
+            deck = self.state.deck(filters)
+            if not len(deck) or k <= 0:
+                return []
+            if repeat:
+                rows = [deck.sample()] if k == 1 else deck.sample_many(k).tolist()
+                if journal:
+                    nos = self.roster.nos
+                    journal.record(filters, [nos[i] for i in rows], repeat=True)
+            else:
+                rows = [deck.draw()] if k == 1 else deck.draw_many(k).tolist()
+        self.calls += 1
+        if journal:
+            journal.tag(mark, self.calls)
+            journal.flush()
+        self.state.called(rows)
+        return rows
+
+    def pick(self, filters=(), repeat=False, weighted=False):
+        """抽取一个学生，返回其全部字段，没有符合条件的学生时返回None"""
+        rows = self.draw(1, filters, repeat, weighted)
+        return self.roster.row(rows[0]) if rows else None
+
+    def pick_many(self, k, filters=(), repeat=False, weighted=False):
+        """抽取k个学生，返回每个人的全部字段"""
+        return self.rows(self.draw(k, filters, repeat, weighted))
+
+    def rows(self, rows):
+        row = self.roster.row
+        return [row(i) for i in rows]
+
+    def rebind(self, roster, mapping):
+        """换成新的名单（mapping由 Roster.remap 预先算好），仍在名单中的学生保留抽选进度
+
+        换名单后开始新的会话，随机数生成器换成由原种子派生的新种子。
+        """
+        picker = Picker.__new__(Picker)
+        picker.roster = roster
+        picker.journal = self.journal
+        picker.seed = self.seed.spawn(1)[0]
+        picker.rng = np.random.default_rng(picker.seed)
+        picker.calls = 0
+        picker.state = self.state.rebind(roster, mapping, picker._decklog if self.journal else None, picker.rng)
+        if self.journal:
+            self.journal.session(picker.seed)
+        return picker
+
+    def reset(self):
+        """清空抽选进度"""
+        self.state = DrawState(self.roster, self._decklog if self.journal else None, self.rng)
+
+    def add(self, record):
+        """新增一个学生，只更新这一行相关的索引和抽选进度，返回行号"""
+        row, before = self.roster.add(record)
+        self.state.move(row, before, self.roster.keys(row))
+        return row
+
+    def remove(self, no):
+        """删除学号为no的学生，找不到时抛出KeyError"""
+        row, before = self.roster.remove(no)
+        self.state.move(row, before, None)
+
+    def update(self, no, record):
+        """修改学号为no的学生的若干字段，已抽到的学生仍然算作已抽到"""
+        row, before = self.roster.update(no, record)
+        self.state.move(row, before, self.roster.keys(row))
+
+    def apply(self, changes):
+        """应用 Roster.diff 的结果：(新增的学生, 删除的学号, 修改过的学生)"""
+        added, removed, changed = changes
+        for no in removed:
+            self.remove(no)
+        for record in changed:
+            self.update(record["no"], record)
+        for record in added:
+            self.add(record)
+
+
+def regenerate(roster, path):
+    """按抽选记录中的种子重新执行每个会话的抽选，核对结果是否与记录一致
+
+    依次读取 path.old（压缩时归档的旧记录）和 path，每遇到一个会话就用记录的种子
+    和当时的进度新建Picker，再按记录中的筛选条件和人数重新抽选。
+    返回 (一致的抽选次数, [(会话种子, 记录的学号, 重新生成的学号), ...])。
+    名单需要与当时相同；会话中途名单被整体替换的，替换后会另起一个会话，
+    而原地编辑（add / remove / update）之后的抽选无法重新生成。
+    """
+    journal = Journal(path)  # 只用来累计进度，不写文件
+    nos = roster.nos
+    picker = None
+    group = []
+    matched = 0
+    mismatched = []
+
+    def finish():
+        nonlocal matched
+        if picker is None or not group:
+            group.clear()
+            return
+        filters = tuple(tuple(x) for x in group[0]["f"])
+        expected = [no for r in group if not r.get("reset") for no in r["no"]]
+        repeat = any(r.get("repeat") for r in group)
+        weighted = any(r.get("weighted") for r in group)
+        rows = picker.draw(len(expected), filters, repeat, weighted)
+        got = [nos[r] for r in rows]
+        if got == expected:
+            matched += 1
+        else:
+            mismatched.append((picker.seed.entropy, expected, got))
+        group.clear()
+
+    for rec in journal.read(path + ".old", path):
+        if rec.get("session"):
+            finish()
+            picker = Picker(roster, seed=np.random.SeedSequence(rec["seed"], spawn_key=tuple(rec.get("spawn", ()))))
+            picker.state.restore(journal.drawn)
+            picker.state.recount(journal.counts)
+            continue
+        call = rec.get("c")
+        if group and call != group[0]["c"]:
+            finish()
+        if call is not None:
+            group.append(rec)
+        journal.apply(rec, roster)
+    finish()
+    return matched, mismatched
+
+
+class PickerPool:
+    """多份名单：按名字保存各自的 Picker（索引、筛选位图和抽选进度）
+
+    切换名单只是取出已经加载好的 Picker，不会重新读取文件。
+    保存的名单超过capacity份时淘汰最久没有使用的，被淘汰的名单下次使用时
+    重新加载（抽选进度由抽选记录恢复），on_evict(name, picker) 在淘汰时调用。
+    """
+
+    def __init__(self, capacity=8, on_evict=None):
+        self.capacity = capacity
+        self.on_evict = on_evict
+        self.pickers = OrderedDict()
+
+    def __contains__(self, name):
+        return name in self.pickers
+
+    def __len__(self):
+        return len(self.pickers)
+
+    def get(self, name):
+        """取出名单并标记为最近使用，没有加载过时返回None"""
+        picker = self.pickers.get(name)
+        if picker is not None:
+            self.pickers.move_to_end(name)
+        return picker
+
+    def peek(self, name):
+        """取出名单但不改变淘汰顺序"""
+        return self.pickers.get(name)
+
+    def put(self, name, picker):
+        """保存名单并标记为最近使用"""
+        self.pickers[name] = picker
+        self.pickers.move_to_end(name)
+        self.shrink()
+
+    def replace(self, name, picker):
+        """替换已保存的名单（例如文件被修改后），不改变淘汰顺序"""
+        if name in self.pickers:
+            self.pickers[name] = picker
+
+    def resize(self, capacity):
+        self.capacity = capacity
+        self.shrink()
+
+    def shrink(self):
+        while len(self.pickers) > max(self.capacity, 1):
+            name, picker = self.pickers.popitem(last=False)
+            if self.on_evict:
+                self.on_evict(name, picker)
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import heapq
+import itertools
+import threading
+import subprocess
+from collections import deque
+from loguru import logger
+
+class Timer:
+    """定时任务句柄，可以通过 BackgroundService.cancel() 取消"""
+
+    def __init__(self, due, interval, fn, args):
+        self.due = due
+        self.interval = interval  # None表示只执行一次
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+class BackgroundService:
+    """事件驱动的后台服务
+
+    所有任务都在同一个后台线程中执行：
+      submit()     立即执行
+      call_later() 延迟执行
+      call_every() 周期执行
+      watch()      文件发生变化时执行
+    线程在没有任务时阻塞等待，有任务提交或 stop() 时立刻被唤醒。
+    """
+
+    def __init__(self, plugin_path):
+        self.plugin_path = plugin_path
+        self.running = False
+        self.thread = None
+        self.cond = threading.Condition()
+        self.ready = deque()  # 待执行的任务
+        self.timers = []  # (到期时间, 序号, Timer) 组成的堆
+        self.seq = itertools.count()
+        # 示例：每60秒执行一次任务；只在这里注册一次，stop() 后再 start() 沿用同一个定时任务
+        self.heartbeat = self.call_every(60, self._execute_background_task)
+
+    def start(self):
+        """启动后台服务"""
+        if self.running:
+            return
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run_service, daemon=True)
+        self.thread.start()
+        logger.info(f"插件 {os.path.basename(self.plugin_path)} 后台服务已启动")
+
+    def stop(self):
+        """停止后台服务"""
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        logger.info(f"插件 {os.path.basename(self.plugin_path)} 后台服务已停止")
+
+    def submit(self, fn, *args):
+        """提交一个任务，尽快在后台线程中执行"""
+        with self.cond:
+            self.ready.append((fn, args))
+            self.cond.notify()
+
+    def call_later(self, delay, fn, *args):
+        """delay秒后执行一次"""
+        return self._schedule(Timer(time.monotonic() + delay, None, fn, args))
+
+    def call_every(self, interval, fn, *args):
+        """每隔interval秒执行一次"""
+        return self._schedule(Timer(time.monotonic() + interval, interval, fn, args))
+
+    def cancel(self, timer):
+        """取消定时任务"""
+        timer.cancelled = True
+
+    def watch(self, path, fn, interval=1.0):
+        """每隔interval秒检查一次文件，修改时间或大小变化时以 fn(path) 的形式触发任务"""
+        def stamp():
+            try:
+                st = os.stat(path)
+                return st.st_mtime_ns, st.st_size
+            except OSError:
+                return None
+        last = [stamp()]
+        def check():
+            now = stamp()
+            if now != last[0]:
+                last[0] = now
+                fn(path)
+        return self.call_every(interval, check)
+
+    def _schedule(self, timer):
+        with self.cond:
+            heapq.heappush(self.timers, (timer.due, next(self.seq), timer))
+            self.cond.notify()
+        return timer
+
+    def _run_service(self):
+        """运行后台服务主循环"""
+        logger.info(f"插件 {os.path.basename(self.plugin_path)} 后台服务开始运行")
+
+        while True:
+            with self.cond:
+                while self.running and not self.ready:
+                    now = time.monotonic()
+                    while self.timers and self.timers[0][0] <= now:
+                        _, _, timer = heapq.heappop(self.timers)
+                        if timer.cancelled:
+                            continue
+                        self.ready.append((timer.fn, timer.args))
+                        if timer.interval is not None:
+                            timer.due = now + timer.interval
+                            heapq.heappush(self.timers, (timer.due, next(self.seq), timer))
+                    if self.ready:
+                        break
+                    self.cond.wait(self.timers[0][0] - now if self.timers else None)
+                if not self.running:
+                    break
+                fn, args = self.ready.popleft()
+            try:
+                fn(*args)
+            except Exception as e:
+                logger.error(f"插件 {os.path.basename(self.plugin_path)} 后台服务运行错误: {e}")
+
+    def _execute_background_task(self):
+        """执行后台任务（可由插件开发者重写此方法）"""
+        # 默认实现：记录日志
+        logger.info(f"插件 {os.path.basename(self.plugin_path)} 后台任务执行中...")
+
+        # 插件开发者可以在这里添加自己的后台逻辑
+        # 例如：
+        # - 数据同步
+        # - 定时检查
+        # - 消息推送
+        # - 系统监控
+        # 等等
+
+# 全局服务实例
+service_instance = None
+
+def start_background_service(plugin_path):
+    """启动后台服务"""
+    global service_instance
+    if service_instance is None:
+        service_instance = BackgroundService(plugin_path)
+        service_instance.start()
+    return service_instance
+
+def stop_background_service():
+    """停止后台服务"""
+    global service_instance
+    if service_instance:
+        service_instance.stop()
+        service_instance = None
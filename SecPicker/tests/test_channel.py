@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from multiprocessing.connection import Client
+
+from secpicker.channel import ResultPublisher, subscribe
+
+READERS = 3
+MESSAGES = 200
+BACKLOG = 20
+PADDING = "x" * 65536  # 每条消息64KB，不读的订阅者很快会塞满套接字缓冲区
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@unittest.skipIf(os.name == "nt", "Windows 上使用命名管道")
+class PublisherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.publisher = ResultPublisher(os.path.join(self.dir.name, "secpicker.sock"), backlog=BACKLOG)
+        self.publisher.start()
+
+    def tearDown(self):
+        self.publisher.stop()
+        self.dir.cleanup()
+
+    def test_slow_subscriber_does_not_block(self):
+        """一个不读取的订阅者不影响抽选和其他订阅者，stop() 后所有订阅者的迭代结束"""
+        received = [[] for _ in range(READERS)]
+
+        def read(out):
+            for msg in subscribe(self.publisher.address):
+                out.append(msg["seq"])
+
+        readers = [threading.Thread(target=read, args=(out,), daemon=True) for out in received]
+        for t in readers:
+            t.start()
+        stalled = Client(self.publisher.address)  # 连上之后从不读取
+        try:
+            self.assertTrue(wait_for(lambda: len(self.publisher.subscribers) == READERS + 1))
+
+            # 每批不超过积压上限，等读取的订阅者收完再发下一批；不读的订阅者早已积满，只能丢弃旧消息
+            elapsed = 0
+            for start in range(0, MESSAGES, BACKLOG):
+                t = time.perf_counter()
+                for seq in range(start, min(start + BACKLOG, MESSAGES)):
+                    self.publisher.publish(json.dumps({"seq": seq, "text": PADDING}).encode("utf-8"))
+                elapsed += time.perf_counter() - t
+                end = min(start + BACKLOG, MESSAGES)
+                self.assertTrue(wait_for(lambda: all(len(out) == end for out in received)))
+            self.assertLess(elapsed, 1)
+            self.assertGreater(sum(sub.dropped for sub in self.publisher.subscribers), 0)
+
+            t = time.perf_counter()
+            self.publisher.stop()
+            self.assertLess(time.perf_counter() - t, 2)
+            for reader in readers:
+                reader.join(timeout=5)
+                self.assertFalse(reader.is_alive())
+        finally:
+            stalled.close()
+        for out in received:
+            self.assertEqual(out, list(range(MESSAGES)))
+
+
+if __name__ == "__main__":
+    unittest.main()
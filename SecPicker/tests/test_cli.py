@@ -0,0 +1,31 @@
+import unittest
+
+from cli import groups, parse_args
+from secpicker.picker import Picker, Roster
+
+
+def make_picker():
+    return Picker(Roster({
+        "name": ["甲", "乙", "丙", "丁"],
+        "sex": ["0", "1", "0", "1"],
+        "no": ["1", "2", "3", "4"],
+        "class": ["1", "1", "2", "3"],
+    }))
+
+
+class GroupsTest(unittest.TestCase):
+
+    def test_by_column(self):
+        args = parse_args(["names.csv", "--by", "class"])
+        self.assertEqual([g for g, _ in groups(make_picker(), args)], ["1", "2", "3"])
+
+    def test_by_and_filter_same_column(self):
+        """按某列分组同时又按该列筛选时，只抽符合筛选条件的那一组"""
+        args = parse_args(["names.csv", "--by", "class", "--filter", "class=2"])
+        self.assertEqual([g for g, _ in groups(make_picker(), args)], ["2"])
+        args = parse_args(["names.csv", "--by", "sex", "--sex", "1"])
+        self.assertEqual([g for g, _ in groups(make_picker(), args)], ["1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+import subprocess
+import unittest
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("PyQt5", "qfluentwidgets", "pandas", "numpy")
+
+
+class PluginImportTest(unittest.TestCase):
+
+    def test_plugin_info_skips_heavy_imports(self):
+        """只获取插件信息时不能导入界面库、pandas 或 numpy（python -X importtime）"""
+        code = "import sys; sys.path.append(%r); import main; main.get_plugin_info()" % PLUGIN_DIR
+        with tempfile.TemporaryDirectory() as d:
+            # get_plugin_info() 会在当前目录下创建配置文件
+            out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                 capture_output=True, text=True, cwd=d)
+        self.assertEqual(out.returncode, 0, out.stderr)
+        loaded = set()
+        for line in out.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                loaded.add(line.rsplit("|", 1)[1].strip().split(".")[0])
+        self.assertIn("main", loaded)
+        self.assertEqual(sorted(loaded.intersection(HEAVY)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+
+from secpicker.picker import Picker, Roster, cache_file, file_stamp, load_roster, make_filters
+
+GIRLS = make_filters(sex="1")
+BOYS = make_filters(sex="0")
+
+
+def make_picker():
+    return Picker(Roster({
+        "name": ["甲", "乙", "丙", "丁", "戊"],
+        "sex": ["0", "1", "0", "1", "1"],
+        "no": ["1", "2", "3", "4", "5"],
+    }), seed=0)
+
+
+class WeightedEditTest(unittest.TestCase):
+
+    def nos(self, picker, rows):
+        return {picker.roster.nos[r] for r in rows}
+
+    def test_update_then_weighted_draw(self):
+        """被改出某个筛选池的学生，在别的池中被抽到后也不能回到原来的池"""
+        picker = make_picker()
+        picker.draw(1, GIRLS, weighted=True)
+        picker.update("2", {"sex": "0"})
+        picker.draw(1, BOYS, weighted=True)  # 单个抽选的权重更新
+        picker.draw(50, BOYS, weighted=True)  # 批量抽选的权重更新
+        self.assertEqual(self.nos(picker, picker.roster.pool(GIRLS)), {"4", "5"})
+        self.assertEqual(self.nos(picker, picker.draw(300, GIRLS, weighted=True)), {"4", "5"})
+
+    def test_update_back_into_pool(self):
+        picker = make_picker()
+        picker.draw(1, GIRLS, weighted=True)
+        picker.update("2", {"sex": "0"})
+        picker.update("2", {"sex": "1"})
+        self.assertEqual(self.nos(picker, picker.draw(300, GIRLS, weighted=True)), {"2", "4", "5"})
+
+    def test_removed_student_is_never_drawn(self):
+        picker = make_picker()
+        picker.draw(1, GIRLS, weighted=True)
+        picker.draw(1, GIRLS)
+        picker.remove("4")
+        self.assertNotIn("4", self.nos(picker, picker.draw(300, GIRLS, weighted=True)))
+        self.assertNotIn("4", self.nos(picker, picker.draw(300, GIRLS)))
+
+
+class DeckEditTest(unittest.TestCase):
+
+    def test_round_after_edits(self):
+        """修改名单后，一轮不重复抽选恰好抽到每个在册学生一次"""
+        picker = Picker(Roster({
+            "name": ["学生%d" % i for i in range(40)],
+            "sex": [str(i % 2) for i in range(40)],
+            "no": [str(i + 1) for i in range(40)],
+        }), seed=1)
+        first = picker.draw(7)
+        for no in ("3", "8", "21", "40"):
+            picker.remove(no)
+        picker.update("5", {"sex": "1"})
+        for i in range(41, 46):
+            picker.add({"name": "新学生", "sex": "0", "no": str(i)})
+        first = [r for r in first if r not in picker.roster.removed]
+        rows = first + picker.draw(len(picker.roster) - len(first))
+        self.assertEqual(len(rows), len(set(rows)))
+        self.assertEqual(sorted(rows), picker.roster.pool().tolist())
+
+
+class CacheTest(unittest.TestCase):
+
+    def test_changed_roster_gets_new_cache_file(self):
+        """名单变化后写入新的缓存文件，不替换仍被映射着的旧缓存"""
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "names.csv")
+            cache = os.path.join(d, "names.cache")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("name,sex,no\n甲,0,1\n乙,1,2\n")
+            load_roster(path, cache)
+            old = load_roster(path, cache)  # 从映射的缓存读取
+            first = cache_file(cache, file_stamp(path))
+            self.assertTrue(os.path.exists(first))
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("丙,1,3\n")
+            new = load_roster(path, cache)
+            second = cache_file(cache, file_stamp(path))
+            self.assertNotEqual(first, second)
+            self.assertTrue(os.path.exists(second))
+            self.assertEqual(new.length, 3)
+            self.assertEqual(old.pool(GIRLS).tolist(), [1])
+            del old
+
+    def test_empty_roster_round_trip_then_add(self):
+        """空名单从缓存读出后仍有性别、单双数筛选列，新增的学生可以按筛选条件抽到"""
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "names.csv")
+            cache = os.path.join(d, "names.cache")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("name,sex,no\n")
+            fresh = load_roster(path, cache)
+            cached = load_roster(path, cache)
+            self.assertEqual(sorted(cached.bitmaps), sorted(fresh.bitmaps))
+            picker = Picker(cached, seed=0)
+            picker.add({"name": "甲", "sex": "1", "no": "1"})
+            self.assertEqual(picker.draw(1, GIRLS), [0])
+            self.assertEqual(picker.draw(1, make_filters(parity="1")), [0])
+            del cached, picker
+
+
+if __name__ == "__main__":
+    unittest.main()
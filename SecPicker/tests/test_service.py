@@ -0,0 +1,18 @@
+import unittest
+
+from secpicker.service import BackgroundService
+
+
+class BackgroundServiceTest(unittest.TestCase):
+
+    def test_restart_keeps_one_heartbeat(self):
+        """多次 start() / stop() 之后仍然只有一个周期执行的后台任务"""
+        service = BackgroundService(__file__)
+        for _ in range(3):
+            service.start()
+            service.stop()
+        self.assertEqual([timer for _, _, timer in service.timers], [service.heartbeat])
+
+
+if __name__ == "__main__":
+    unittest.main()